@@ -1,37 +1,63 @@
+import os
+
 from clean_birds import clean_bird_flu_data                   # your CDC bird-flu scraper + cleaner
 from app_bigquery.clean_egg_prices import clean_egg_price_data         # your egg-price cleaner
-from app_bigquery.clean_stocks import fetch_stock_data
+from app_bigquery.clean_stocks import STOCK_TABLES, fetch_stock_data
 from app_bigquery.clean_wild_birds import clean_wild_birds
-
-from upload_to_bigquery import main as upload_to_bigquery
+from app_bigquery.etl_runner import run_stages
+from app_bigquery.upload_engine import UPLOAD_TABLES, upload_tables
+from app_modules.helper_modules.artifacts import artifact_path
+
+
+def build_stages(project_id):
+    """
+    Declares every ETL stage with the files it reads and writes. Each upload
+    waits only for the clean stage that writes its table's Parquet artifact.
+    """
+    stages = {
+        # reads the CDC page, cleans and writes the bird_flu artifact
+        "clean_bird_flu": {
+            "func": clean_bird_flu_data,
+            "outputs": [artifact_path("bird_flu")],
+        },
+        # reads the FRED CSV, cleans and writes the egg_prices artifact
+        "clean_egg_prices": {
+            "func": clean_egg_price_data,
+            "outputs": [artifact_path("egg_prices")],
+        },
+        # Not live data connection
+        "clean_wild_birds": {
+            "func": clean_wild_birds,
+            "inputs": ["app_data/prep_data/wild_birds_raw.csv"],
+            "outputs": [artifact_path("wild_birds")],
+        },
+    }
+
+    # pulls CALM, POST, VITL and writes the calmaine, vitl and post artifacts
+    for symbol, file_name in (("CALM", "calmaine_stock.csv"), ("VITL", "vitl_stock.csv"), ("POST", "post_stock.csv")):
+        stages[f"fetch_{symbol.lower()}"] = {
+            "func": lambda symbol=symbol, file_name=file_name: fetch_stock_data(symbol, file_name),
+            "outputs": [artifact_path(STOCK_TABLES[symbol])],
+        }
+
+    for table_name in UPLOAD_TABLES:
+        stages[f"upload_{table_name}"] = {
+            "func": lambda table_name=table_name: upload_tables(project_id, [table_name]),
+            "inputs": [artifact_path(table_name)],
+        }
+    return stages
 
 
 def main():
     print("Starting ETL process…")
+    project_id = os.getenv("GCP_PROJECT_ID", "sipa-adv-c-arnav-fred")
 
-    print("Cleaning bird-flu (commercial) data…")
-    # should read CDC page, clean and write to app_data/bird_flu.csv
-    clean_bird_flu_data()
-
-    print("Cleaning egg-price data…")
-    # should read the FRED/GitHub CSV, clean and write to app_data/cleaned_egg_prices.csv
-    clean_egg_price_data()
-
-    print("Cleaning stock-price data…")
-    # should pull CALM, POST, VITL, clean and write to
-    #   app_data/{calmaine,post,vitl}_stock.csv
-    fetch_stock_data("CALM", "calmaine_stock.csv")
-    fetch_stock_data("VITL", "vitl_stock.csv")
-    fetch_stock_data("POST", "post_stock.csv")
-
-    print("Cleaning wild-bird HPAI data…")
-    # Not live data connection
-    clean_wild_birds()
-
-    print("All cleaning done. Now uploading to BigQuery…")
-    upload_to_bigquery()
+    results = run_stages(build_stages(project_id))
 
+    failed = [name for name, r in results.items() if r["status"] in ("failed", "skipped")]
+    if failed:
+        raise RuntimeError(f"ETL finished with failed or skipped stages: {failed}")
     print("ETL complete.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,27 +1,36 @@
 import pandas as pd
+from app_bigquery.etl_runner import UNCHANGED
+from app_modules.helper_modules.artifacts import artifact_path, is_built_from, write_artifact
+from app_modules.helper_modules.http_fetch import fetch_cached
+from app_modules.helper_modules.normalize import normalize_columns
 
-def clean_egg_price_data():
+def clean_egg_price_data(output_csv="app_data/cleaned_egg_prices.csv"):
     url = (
     "https://fred.stlouisfed.org/graph/fredgraph.csv"
     "?id=APU0000708111"
     "&cosd=2022-01-01"
 )
-    df = pd.read_csv(url)
+    # Rebuilt unless the artifact came from this exact download (see is_built_from)
+    body_path, _ = fetch_cached(url)
+    if is_built_from("egg_prices", body_path):
+        print(f"FRED egg prices unchanged, keeping {artifact_path('egg_prices')}")
+        return UNCHANGED
+
+    df = pd.read_csv(body_path)
 
     # Strip whitespace, rename columns
     df.rename(columns=lambda x: x.strip(), inplace=True)
     df.rename(columns={"APU0000708111": "Avg_Price", "observation_date": "Date"}, inplace=True)
 
     # Parse dates and filter
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = normalize_columns(df, dates=["Date"])
     df = df[df["Date"] >= "2022-01-01"]
 
-    # Set index, sort, and save
-    df.set_index("Date", inplace=True)
-    df.sort_index(inplace=True)
-    df.to_csv("cleaned_egg_prices.csv")
+    # Sort and save
+    df = df.sort_values("Date", ignore_index=True)
+    write_artifact("egg_prices", df, csv_path=output_csv, source_file=body_path)
 
-    print("✅ Cleaned data saved as 'cleaned_egg_prices.csv'")
+    print(f"✅ Cleaned data saved as '{artifact_path('egg_prices')}'")
     print(df.head())
 
 
@@ -1,19 +1,51 @@
 import os
 import pandas as pd
-import requests
 from datetime import datetime
+from app_bigquery.etl_runner import UNCHANGED
+import pyarrow.compute as pc
+from app_modules.helper_modules.artifacts import artifact_path, read_artifact, to_artifact_table, write_artifact
+from app_modules.helper_modules.http_fetch import fetch_json
+from app_modules.helper_modules.normalize import US_DATE, normalize_columns
+from app_modules.query_builder import STOCK_TABLES
 
 
 
-def fetch_stock_data(symbol: str, save_as: str):
+# Earliest date fetched when a ticker has no local history yet
+HISTORY_START = "2015-01-01"
+
+
+def load_saved_history(table_name, csv_path):
+    """
+    Returns a ticker's saved history as an Arrow table, from its Parquet
+    artifact or else its CSV export, or None if neither exists.
+    """
+    if os.path.exists(artifact_path(table_name)):
+        return read_artifact(table_name)
+    if os.path.exists(csv_path):
+        return to_artifact_table(table_name, pd.read_csv(csv_path))
+    return None
+
+
+def fetch_stock_data(symbol: str, save_as: str, out_dir: str = "app_data"):
     '''
-    This requrires the correct symbols to work. They are CALM, VITL, and POST (Could work for other stocks)
-    save_as is the name of the file name and type you want
+    This requrires the correct symbols to work. They are CALM, VITL, and POST (Could work for
+    other stocks once they are added to STOCK_TABLES and ARTIFACT_SCHEMAS)
+    save_as is the name of the optional CSV export
+    Only the days after the last date already saved are requested and merged in
+    (the last day is fetched again in case it was saved mid-session).
+    Returns UNCHANGED when nothing new came back.
     '''
+    table_name = STOCK_TABLES[symbol]
+    csv_path = os.path.join(out_dir, save_as)
+    history = load_saved_history(table_name, csv_path)
+    last_date = pc.max(history["Date"]).as_py() if history is not None and history.num_rows else None
+
     today = datetime.today().strftime('%Y-%m-%d')
+    from_date = last_date.strftime('%Y-%m-%d') if last_date is not None else HISTORY_START
+
     url = (
         f"https://api.nasdaq.com/api/quote/{symbol}/historical"
-        f"?assetclass=stocks&fromdate=2015-01-01&todate={today}"
+        f"?assetclass=stocks&fromdate={from_date}&todate={today}"
         f"&limit=9999"
     )
     headers = {
@@ -22,15 +54,16 @@ def fetch_stock_data(symbol: str, save_as: str):
         "Referer": f"https://www.nasdaq.com/market-activity/stocks/{symbol.lower()}/historical"
     }
 
-    print(f"Downloading full historical data for {symbol}")
-    response = requests.get(url, headers=headers, timeout=15)
-    response.raise_for_status()
-    
-    json_data = response.json()
-    rows = json_data["data"]["tradesTable"]["rows"]
+    print(f"Downloading {symbol} history from {from_date}")
+    # Shared session: the three tickers reuse one pooled connection to Nasdaq
+    json_data = fetch_json(url, headers=headers)
+    rows = ((json_data.get("data") or {}).get("tradesTable") or {}).get("rows") or []
 
     # Convert to DataFrame
     df = pd.DataFrame(rows)
+    if df.empty:
+        print(f"No new {symbol} rows since {from_date}")
+        return UNCHANGED
 
     # Rename columns to match CSV structure
     df.rename(columns={
@@ -42,27 +75,24 @@ def fetch_stock_data(symbol: str, save_as: str):
         "low": "Low"
     }, inplace=True)
 
-    # Convert Date column
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-
-    # Clean numeric columns
-    for col in ["Close_Last", "Open", "High", "Low", "Volume"]:
-        df[col] = (
-            df[col]
-            .str.replace("$", "", regex=False)
-            .str.replace(",", "", regex=False)
-            .astype(float)
-        )
-
-    df.sort_values("Date", inplace=True)
-    
-    out_dir = "app_data"
-    os.makedirs(out_dir, exist_ok=True)
-    
-    out_path = os.path.join(out_dir, save_as)
-    
-    df.to_csv(out_path, index=False)
-    print(f"{symbol} data saved to {out_path}")
+    # Convert Date column; the artifact schema cleans "$1,234.50" style numbers
+    df = normalize_columns(df, dates=["Date"], date_format=US_DATE)
+    df = to_artifact_table(table_name, df).to_pandas()
+
+    # Append-merge with the saved history; refetched days replace saved ones
+    if history is not None:
+        merged = pd.concat([history.to_pandas(), df], ignore_index=True)
+        merged = merged.drop_duplicates("Date", keep="last").sort_values("Date", ignore_index=True)
+        if to_artifact_table(table_name, merged).equals(history):
+            print(f"{symbol} history is already up to date")
+            return UNCHANGED
+        print(f"Adding {len(merged) - history.num_rows} new {symbol} rows")
+        df = merged
+    else:
+        df = df.sort_values("Date", ignore_index=True)
+
+    write_artifact(table_name, df, csv_path=csv_path)
+    return df
 
 # Example
 if __name__ == "__main__":
@@ -1,40 +1,41 @@
 import os
-import pandas as pd
+from app_modules.helper_modules.artifacts import write_artifact_chunks
+from app_modules.helper_modules.csv_stream import CSV_BLOCK_BYTES, iter_csv_chunks
+from app_modules.helper_modules.normalize import US_DATE, normalize_columns
+
+# Columns kept from the APHIS export; the rest are never parsed
+WILD_BIRD_COLUMNS = ["State", "County", "Date Detected", "Bird Species"]
+
 
 def clean_wild_birds(
     input_csv: str  = "app_data/prep_data/wild_birds_raw.csv",
-    output_csv: str = "app_data/prep_data/wild_birds.csv"
+    output_csv: str = "app_data/prep_data/wild_birds.csv",
+    block_size: int = CSV_BLOCK_BYTES,
 ):
- 
-    # 1) Load
-    df = pd.read_csv(input_csv)
-
-    # 2) Drop columns we don't need
-    to_drop = [
-        "Submitting Agency",
-        "Sampling Method",
-        "HPAI Strain",
-        "WOAH Classification",
-        "Collection Date"
-    ]
-    df.drop(columns=[c for c in to_drop if c in df.columns], errors="ignore", inplace=True)
-
-    # 3) Parse 'Date Detected'
-    if "Date Detected" in df.columns:
-        df["Date Detected"] = pd.to_datetime(df["Date Detected"], errors="coerce")
-
-    # 4) Ensure target folder exists
+    """
+    Streams the raw detections through the cleaner a block at a time, so
+    memory stays flat however long the history grows.
+    """
+    # 1) Ensure the export folder exists
     folder = os.path.dirname(output_csv)
     if folder and not os.path.exists(folder):
         os.makedirs(folder, exist_ok=True)
 
-    # 5) Save cleaned CSV
-    df.to_csv(output_csv, index=False)
-    print(f"Saved cleaned data to '{output_csv}'")
+    # 2) Read only the needed columns, then parse 'Date Detected' and
+    #    title-case State/County chunk by chunk
+    chunks = (
+        normalize_columns(chunk, dates=["Date Detected"], date_format=US_DATE, title=["State", "County"])
+        for chunk in iter_csv_chunks(input_csv, WILD_BIRD_COLUMNS, block_size=block_size)
+    )
+
+    # 3) Append each chunk to the typed Parquet artifact (output_csv is an optional export)
+    path = write_artifact_chunks("wild_birds", chunks, csv_path=output_csv)
+    print(f"Saved cleaned data to '{path}'")
+    return path
 
 # Example usage:
 if __name__ == "__main__":
     clean_wild_birds(
         input_csv="app_data/prep_data/wild_birds_raw.csv",
         output_csv="app_data/prep_data/wild_birds.csv"
-    )
\ No newline at end of file
+    )
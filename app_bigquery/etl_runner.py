@@ -0,0 +1,92 @@
+# app_bigquery/etl_runner.py
+
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Stages are mostly downloads and uploads, so they run on threads
+MAX_STAGE_WORKERS = 6
+
+# Returned by a stage whose outputs did not change (e.g. its source answered
+# 304 Not Modified). Stages that only depend on unchanged stages do not run.
+UNCHANGED = "unchanged"
+
+
+def stage_dependencies(stages):
+    """
+    Returns {stage: [stages it waits for]}, linking each stage to the
+    stages whose outputs it reads. stages is {name: {"func", "inputs", "outputs"}}.
+    """
+    producers = {}
+    for name, stage in stages.items():
+        for path in stage.get("outputs", []):
+            if path in producers:
+                raise ValueError(f"Both '{producers[path]}' and '{name}' write {path}")
+            producers[path] = name
+
+    return {
+        name: sorted({producers[path] for path in stage.get("inputs", []) if path in producers} - {name})
+        for name, stage in stages.items()
+    }
+
+
+def _timed(func):
+    start = time.perf_counter()
+    try:
+        result = func()
+        status = UNCHANGED if isinstance(result, str) and result == UNCHANGED else "ok"
+        return {"status": status, "seconds": time.perf_counter() - start, "error": None}
+    except Exception as e:
+        traceback.print_exc()
+        return {"status": "failed", "seconds": time.perf_counter() - start, "error": repr(e)}
+
+
+def run_stages(stages, max_workers=MAX_STAGE_WORKERS):
+    """
+    Runs every stage once its inputs are written, with independent stages
+    in parallel. A failed stage only skips the stages downstream of it, and
+    stages whose inputs all come from unchanged stages are marked unchanged
+    without running.
+    Returns {stage: {"status": "ok"|"unchanged"|"failed"|"skipped", "seconds", "error"}}.
+    """
+    deps = stage_dependencies(stages)
+    pending = dict(deps)
+    results, running = {}, {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            ready = [name for name, needs in pending.items() if all(n in results for n in needs)]
+            for name in ready:
+                del pending[name]
+                statuses = [results[n]["status"] for n in deps[name]]
+                blocked = [n for n in deps[name] if results[n]["status"] not in ("ok", UNCHANGED)]
+                if blocked:
+                    results[name] = {"status": "skipped", "seconds": 0.0, "error": f"upstream {blocked} did not finish"}
+                elif statuses and all(status == UNCHANGED for status in statuses):
+                    results[name] = {"status": UNCHANGED, "seconds": 0.0, "error": None}
+                else:
+                    print(f"Starting {name}…")
+                    running[pool.submit(_timed, stages[name]["func"])] = name
+            if ready and not running:
+                continue  # skipped stages may unblock others
+            if not running:
+                raise ValueError(f"Stages depend on each other in a cycle: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                print(f"Finished {name}: {results[name]['status']} in {results[name]['seconds']:.1f}s")
+
+    print_report(results, time.perf_counter() - start)
+    return results
+
+
+def print_report(results, wall_seconds):
+    print("ETL stage timings:")
+    for name, r in sorted(results.items(), key=lambda item: -item[1]["seconds"]):
+        line = f"  {name:<24} {r['status']:<8} {r['seconds']:7.1f}s"
+        print(line + (f"  {r['error']}" if r["error"] else ""))
+    total = sum(r["seconds"] for r in results.values())
+    print(f"Wall time {wall_seconds:.1f}s for {total:.1f}s of stage time")
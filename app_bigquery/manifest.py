@@ -0,0 +1,83 @@
+# app_bigquery/manifest.py
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+# What each table's last successful upload contained:
+# {table: {"hash": sha256 of the ETL output, "max_date": "YYYY-MM-DD", "rows": int, "loaded_at": iso time}}
+MANIFEST_PATH = "app_data/upload_manifest.json"
+
+HASH_CHUNK_BYTES = 1 << 20
+
+_manifest_lock = threading.Lock()
+
+
+def file_hash(path):
+    """
+    Returns the sha256 hex digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """
+    Returns the saved manifest, or an empty one if there is none yet or it cannot be read.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable upload manifest {path}: {e}")
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH, tables=None):
+    """
+    Writes the manifest atomically. With tables, only those entries are
+    written over the saved file, so uploads running side by side keep each other's entries.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with _manifest_lock:
+        merged = load_manifest(path) if tables is not None else {}
+        merged.update({name: entry for name, entry in manifest.items() if tables is None or name in tables})
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+def is_unchanged(manifest, table_name, content_hash):
+    entry = manifest.get(table_name)
+    return entry is not None and entry.get("hash") == content_hash
+
+
+def watermark(manifest, table_name):
+    """
+    Returns the high-water date recorded for a table, or None.
+    """
+    max_date = manifest.get(table_name, {}).get("max_date")
+    return datetime.date.fromisoformat(max_date) if max_date else None
+
+
+def record_upload(manifest, table_name, content_hash, max_date, rows):
+    """
+    Records a successful upload. Safe to call from several upload threads.
+    """
+    with _manifest_lock:
+        manifest[table_name] = {
+            "hash": content_hash,
+            "max_date": max_date.isoformat() if max_date is not None else None,
+            "rows": int(rows),
+            "loaded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        }
@@ -0,0 +1,250 @@
+# app_bigquery/upload_engine.py
+
+import functools
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from google.api_core.exceptions import BadRequest, NotFound
+from google.cloud import bigquery
+from google.oauth2 import service_account
+from app_bigquery.manifest import (
+    MANIFEST_PATH,
+    file_hash,
+    is_unchanged,
+    load_manifest,
+    record_upload,
+    save_manifest,
+    watermark,
+)
+from app_modules.helper_modules.artifacts import ARTIFACT_SCHEMAS, artifact_path, read_artifact, to_artifact_table
+
+DATASET_ID = "chicken_egg"
+
+# Table loads are network bound, so a few run at once
+MAX_UPLOAD_WORKERS = 4
+
+# BigQuery column type for each Arrow type used by the artifacts
+BIGQUERY_TYPES = {
+    pa.string(): "STRING",
+    pa.date32(): "DATE",
+    pa.int64(): "INTEGER",
+    pa.float64(): "FLOAT",
+}
+
+# Standard SQL names BigQuery may report for the legacy types above
+_TYPE_ALIASES = {"INT64": "INTEGER", "FLOAT64": "FLOAT"}
+
+# One spec per BigQuery table: the date column used for incremental loads
+# and columns that must be set. Each table is loaded from its typed Parquet
+# artifact (see helper_modules.artifacts), whose schema is also the table's.
+UPLOAD_TABLES = {
+    "wild_birds": {"date_column": "Date Detected"},
+    "bird_flu": {"date_column": "Outbreak Date", "required": ["fips"]},
+    "egg_prices": {"date_column": "Date"},
+    "calmaine": {"date_column": "Date"},
+    "post": {"date_column": "Date"},
+    "vitl": {"date_column": "Date"},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_client(project_id):
+    """
+    Builds one BigQuery client from GOOGLE_APPLICATION_CREDENTIALS, shared by every table load.
+    """
+    creds = service_account.Credentials.from_service_account_file(
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"]
+    )
+    return bigquery.Client(project=project_id, credentials=creds)
+
+
+def bigquery_schema(table_name):
+    return [
+        bigquery.SchemaField(field.name, BIGQUERY_TYPES[field.type])
+        for field in ARTIFACT_SCHEMAS[table_name]
+    ]
+
+
+def schema_matches(client, table_id, table_name):
+    """
+    Returns whether the BigQuery table has exactly the artifact's column names and types, in order.
+    """
+    actual = [(f.name, _TYPE_ALIASES.get(f.field_type, f.field_type)) for f in client.get_table(table_id).schema]
+    return actual == [(f.name, f.field_type) for f in bigquery_schema(table_name)]
+
+
+def ensure_table(client, table_id, table_name):
+    try:
+        client.get_table(table_id)
+        print(f"Table '{table_id}' already exists.")
+    except NotFound:
+        client.create_table(bigquery.Table(table_id, schema=bigquery_schema(table_name)))
+        print(f"Table '{table_id}' created.")
+
+
+def read_upload_table(table_name, spec, source_path=None):
+    """
+    Returns a table's rows as Arrow data: its Parquet artifact, or a CSV
+    export at source_path converted to the artifact schema. Rows missing
+    a required column are dropped.
+    """
+    if source_path and source_path.endswith(".csv"):
+        table = to_artifact_table(table_name, pd.read_csv(source_path))
+    elif source_path:
+        table = pq.read_table(source_path)
+    else:
+        table = read_artifact(table_name)
+
+    for name in spec.get("required", []):
+        table = table.filter(pc.is_valid(table[name]))
+    return table
+
+
+def max_loaded_date(client, table_id, date_column):
+    """
+    Returns the latest date already in the table, or None when it is empty or cannot be read.
+    """
+    try:
+        query = f"SELECT MAX(`{date_column}`) AS max_date FROM `{table_id}`"
+        max_date = client.query(query).to_dataframe()["max_date"].iloc[0]
+    except Exception as e:
+        print("Error checking for existing records, will attempt to append all:", e)
+        return None
+    return pd.to_datetime(max_date).date() if pd.notnull(max_date) else None
+
+
+def _load(client, table, table_id, table_name, write_disposition):
+    """
+    Streams Arrow data to a load job as Parquet, so no CSV or pandas step is involved.
+    """
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    buffer.seek(0)
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.PARQUET,
+        schema=bigquery_schema(table_name),
+        write_disposition=write_disposition,
+    )
+    client.load_table_from_file(buffer, table_id, job_config=job_config).result()
+
+
+def _result(table_name, rows, start, skipped=False):
+    seconds = time.perf_counter() - start
+    return {
+        "table": table_name,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+        "skipped": skipped,
+    }
+
+
+def upload_table(client, project_id, table_name, spec=None, source_path=None, manifest=None, content_hash=None):
+    """
+    Appends the rows of one table's artifact that are newer than what
+    BigQuery already holds. source_path overrides the artifact with another
+    Parquet file or a CSV export. With a manifest (see app_bigquery.manifest),
+    unchanged artifacts are skipped without touching BigQuery, the recorded
+    watermark replaces the MAX(date) query, and successful loads are recorded.
+    Returns {"table", "rows", "seconds", "rows_per_second", "skipped"}.
+    """
+    spec = spec or UPLOAD_TABLES[table_name]
+    table_id = f"{project_id}.{DATASET_ID}.{table_name}"
+    start = time.perf_counter()
+
+    if manifest is not None:
+        content_hash = content_hash or file_hash(source_path or artifact_path(table_name))
+        if is_unchanged(manifest, table_name, content_hash):
+            print(f"{table_name} is unchanged since its last upload, skipping.")
+            return _result(table_name, 0, start, skipped=True)
+
+    full = read_upload_table(table_name, spec, source_path)
+    table = full
+    dates = full[spec["date_column"]]
+
+    # --- Incremental loading ---
+    max_date = watermark(manifest, table_name) if manifest is not None else None
+    if max_date is None:
+        ensure_table(client, table_id, table_name)
+        max_date = max_loaded_date(client, table_id, spec["date_column"])
+    if max_date is not None:
+        table = full.filter(pc.greater(dates, pa.scalar(max_date, pa.date32())))
+        print(f"Found max date in {table_name}: {max_date}. Filtered out {full.num_rows - table.num_rows} old records.")
+    else:
+        print(f"No previous records found in {table_name}.")
+
+    if table.num_rows:
+        try:
+            print(f"Trying to append: {table.num_rows} records to table: {table_id}")
+            _load(client, table, table_id, table_name, bigquery.WriteDisposition.WRITE_APPEND)
+        except BadRequest:
+            # Only a schema change replaces the table; bad values, malformed
+            # payloads and quota errors must not wipe it
+            if schema_matches(client, table_id, table_name):
+                raise
+            # The artifact holds the full history, so a replace keeps every row
+            print(f"Schema mismatch detected. Replacing {table_id} with all {full.num_rows} records...")
+            table = full
+            _load(client, table, table_id, table_name, bigquery.WriteDisposition.WRITE_TRUNCATE)
+
+    if manifest is not None:
+        latest = pc.max(dates).as_py()
+        latest = max((d for d in (max_date, latest) if d is not None), default=None)
+        record_upload(manifest, table_name, content_hash, latest, full.num_rows)
+    return _result(table_name, table.num_rows, start)
+
+
+def upload_tables(project_id, tables=None, max_workers=MAX_UPLOAD_WORKERS, client=None,
+                  manifest_path=MANIFEST_PATH):
+    """
+    Loads every table in UPLOAD_TABLES (or just `tables`) on a bounded thread
+    pool sharing one client, and prints per-table throughput. Raises once all
+    loads have finished if any of them failed.
+    Tables whose artifact matches the manifest at manifest_path are skipped,
+    and no client is created when nothing changed. Pass manifest_path=None
+    to always check BigQuery.
+    """
+    names = list(tables or UPLOAD_TABLES)
+    start = time.perf_counter()
+
+    manifest = load_manifest(manifest_path) if manifest_path else None
+    hashes = {}
+    if manifest is not None:
+        hashes = {name: file_hash(artifact_path(name)) for name in names}
+        if all(is_unchanged(manifest, name, hashes[name]) for name in names):
+            print("All artifacts are unchanged since the last upload, nothing to do.")
+            return [_result(name, 0, start, skipped=True) for name in names]
+
+    client = client or get_client(project_id)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            name: pool.submit(upload_table, client, project_id, name,
+                              manifest=manifest, content_hash=hashes.get(name))
+            for name in names
+        }
+
+    if manifest is not None:
+        save_manifest(manifest, manifest_path, tables=names)
+
+    results, failed = [], {}
+    for name, future in futures.items():
+        try:
+            results.append(future.result())
+        except Exception as e:
+            failed[name] = e
+
+    for r in results:
+        if r["skipped"]:
+            print(f"  {r['table']}: unchanged")
+        else:
+            print(f"  {r['table']}: {r['rows']} rows in {r['seconds']:.1f}s ({r['rows_per_second']:.0f} rows/s)")
+    print(f"Uploaded {len(results)} tables in {time.perf_counter() - start:.1f}s")
+
+    if failed:
+        raise RuntimeError(f"Upload failed for {list(failed)}: {failed}")
+    return results
@@ -1,29 +1,61 @@
 # download_csv_module.py
-import requests
-from io import StringIO
+import json
+import os
+import threading
 import pandas as pd
+import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from app_modules.helper_modules import http_fetch
+from app_modules.helper_modules.http_fetch import fetch_cached, fetch_text
 
-def download_csv(website: str, keyword: str) -> pd.DataFrame:
+# CSV links found on scraped pages, keyed by "website|keyword"
+LINK_CACHE_FILE = "csv_links.json"
+
+_link_lock = threading.Lock()
+
+
+def _link_cache_path():
+    return os.path.join(http_fetch.HTTP_CACHE_DIR, LINK_CACHE_FILE)
+
+
+def _load_links():
+    try:
+        with open(_link_cache_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_link(key, link):
+    with _link_lock:
+        links = _load_links()
+        links[key] = link
+        os.makedirs(http_fetch.HTTP_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{_link_cache_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(links, f, indent=2)
+        os.replace(tmp_path, _link_cache_path())
+
+
+def find_csv_link(website: str, keyword: str, refresh: bool = False) -> str:
     """
-    Downloads CSV data from a website by finding the first link that contains the specified keyword.
-    
-    Args:
-        website (str): URL of the website to scrape.
-        keyword (str): Word to search for in the link text or URL.
-    
-    Returns:
-        pd.DataFrame: DataFrame read from the CSV file.
-    
+    Returns the absolute url of the first link on a page whose text or url
+    contains keyword. The link is cached, so the page is only scraped again
+    with refresh=True.
+
     Raises:
         ValueError: If no link containing the keyword is found.
     """
+    key = f"{website}|{keyword}"
+    if not refresh:
+        cached = _load_links().get(key)
+        if cached:
+            return cached
+
     # Fetch the webpage content
-    response = requests.get(website)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
+    soup = BeautifulSoup(fetch_text(website), 'html.parser')
+
     csv_link = None
     # Search for the first anchor tag where the text or href contains the keyword.
     for a in soup.find_all('a', href=True):
@@ -32,24 +64,49 @@ def download_csv(website: str, keyword: str) -> pd.DataFrame:
             break
     if not csv_link:
         raise ValueError(f"No link found containing keyword '{keyword}'")
-    
+
     # Convert relative URLs to absolute URLs
     if not csv_link.startswith("http"):
         csv_link = urljoin(website, csv_link)
-    
-    # Download the CSV file
-    csv_response = requests.get(csv_link)
-    csv_response.raise_for_status()
-    csv_data = StringIO(csv_response.text)
-    df = pd.read_csv(csv_data)
-    return df
 
-# Testing with bird flu data
-website = "https://www.cdc.gov/bird-flu/situation-summary/data-map-commercial.html"
-keyword = "csv"  # or another keyword that appears in the CSV link
+    _save_link(key, csv_link)
+    return csv_link
+
 
-df = download_csv(website, keyword)
-print(df.tail())
+def download_csv_cached(website: str, keyword: str):
+    """
+    Conditionally downloads the CSV linked from a page (see http_fetch.fetch_cached).
+    If the cached link no longer works, the page is scraped again once.
+    Returns (path of the cached CSV, changed).
+    """
+    try:
+        return fetch_cached(find_csv_link(website, keyword))
+    except requests.HTTPError:
+        return fetch_cached(find_csv_link(website, keyword, refresh=True))
 
 
+def download_csv(website: str, keyword: str) -> pd.DataFrame:
+    """
+    Downloads CSV data from a website by finding the first link that contains the specified keyword.
+
+    Args:
+        website (str): URL of the website to scrape.
+        keyword (str): Word to search for in the link text or URL.
+
+    Returns:
+        pd.DataFrame: DataFrame read from the CSV file.
+
+    Raises:
+        ValueError: If no link containing the keyword is found.
+    """
+    csv_path, _ = download_csv_cached(website, keyword)
+    return pd.read_csv(csv_path)
+
+
+# Testing with bird flu data
+if __name__ == "__main__":
+    website = "https://www.cdc.gov/bird-flu/situation-summary/data-map-commercial.html"
+    keyword = "csv"  # or another keyword that appears in the CSV link
 
+    df = download_csv(website, keyword)
+    print(df.tail())
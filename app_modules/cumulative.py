@@ -0,0 +1,228 @@
+# app_modules/cumulative.py
+
+import heapq
+import numpy as np
+import pandas as pd
+
+# Per-state measures kept as prefix sums along the month axis
+STATE_CUBE_MEASURES = ["Flock Size", "Wild Count", "lat_sum", "lat_n", "lng_sum", "lng_n"]
+
+
+def _monthly_state_matrix(flock_rows, wild_rows):
+    """
+    Sums flock and wild rows into one (Month, State) frame with a column per measure.
+    """
+    flock = flock_rows[["Month", "State", "Flock Size", "lat", "lng"]].copy()
+    flock["lat_sum"] = flock["lat"].fillna(0)
+    flock["lat_n"] = flock["lat"].notna().astype(int)
+    flock["lng_sum"] = flock["lng"].fillna(0)
+    flock["lng_n"] = flock["lng"].notna().astype(int)
+    flock = flock.drop(columns=["lat", "lng"])
+
+    wild = wild_rows[["Month", "State", "Wild Count"]]
+    monthly = pd.concat([flock, wild], ignore_index=True)
+    monthly[STATE_CUBE_MEASURES] = monthly[STATE_CUBE_MEASURES].fillna(0)
+    return monthly.groupby(["Month", "State"], observed=True)[STATE_CUBE_MEASURES].sum()
+
+
+def _cube_axes(months, states):
+    labels = [m.strftime("%b %Y") for m in months]
+    return {
+        "months": months,
+        "labels": labels,
+        "index": {label: i for i, label in enumerate(labels)},
+        "states": states,
+    }
+
+
+def _prefix_sums(monthly, measure, months, states):
+    grid = monthly[measure].unstack("State").reindex(index=months, columns=states).fillna(0)
+    return np.cumsum(grid.to_numpy(dtype=float), axis=0)
+
+
+def build_state_cube(flock_grouped, wild_grouped):
+    """
+    Builds prefix sums of flock deaths, wild bird counts and lat/lng per
+    state along an ordered month axis. Inputs are the (Month, State) frames
+    from prep_bird_flu_data(group_by="state") and prep_wild_bird_data.
+    Any cumulative-to-month view is then one row lookup (see state_cube_view).
+    """
+    monthly = _monthly_state_matrix(flock_grouped, wild_grouped)
+    months = pd.DatetimeIndex(monthly.index.get_level_values("Month").unique()).sort_values()
+    states = sorted(monthly.index.get_level_values("State").unique())
+
+    cube = _cube_axes(months, states)
+    for measure in STATE_CUBE_MEASURES:
+        cube[measure] = _prefix_sums(monthly, measure, months, states)
+    return cube
+
+
+def extend_state_cube(cube, flock_rows, wild_rows):
+    """
+    Adds newly loaded months to a cube without rebuilding it. The new rows
+    must hold complete data for every month from their earliest month on;
+    cube months from that month on are replaced, earlier ones are kept.
+    """
+    monthly = _monthly_state_matrix(flock_rows, wild_rows)
+    if monthly.empty:
+        return cube
+
+    new_months = pd.DatetimeIndex(monthly.index.get_level_values("Month").unique()).sort_values()
+    keep = int(np.searchsorted(cube["months"], new_months[0]))
+    states = sorted(set(cube["states"]) | set(monthly.index.get_level_values("State")))
+    positions = [states.index(s) for s in cube["states"]]
+
+    extended = _cube_axes(cube["months"][:keep].append(new_months), states)
+    for measure in STATE_CUBE_MEASURES:
+        # Kept months, widened to any new states
+        head = np.zeros((keep, len(states)))
+        head[:, positions] = cube[measure][:keep]
+
+        # New months continue from the last kept cumulative row
+        tail = _prefix_sums(monthly, measure, new_months, states)
+        if keep > 0:
+            tail += head[-1]
+        extended[measure] = np.vstack([head, tail])
+    return extended
+
+
+def state_cube_view(cube, month_label):
+    """
+    Returns cumulative totals per state up to and including month_label
+    (e.g. "Mar 2024"), with the mean lat/lng of the flock rows so far.
+    """
+    i = cube["index"][month_label]
+    view = pd.DataFrame({
+        "State": cube["states"],
+        "Flock Size": cube["Flock Size"][i],
+        "Wild Count": cube["Wild Count"][i],
+    })
+    with np.errstate(invalid="ignore", divide="ignore"):
+        view["lat"] = cube["lat_sum"][i] / cube["lat_n"][i]
+        view["lng"] = cube["lng_sum"][i] / cube["lng_n"][i]
+
+    # Only states with any activity so far
+    active = (view["Flock Size"] > 0) | (view["Wild Count"] > 0) | (cube["lat_n"][i] > 0)
+    return view[active].reset_index(drop=True)
+
+
+def build_county_store(county_grouped):
+    """
+    Builds a sparse county x month store of running flock-death totals from
+    prep_bird_flu_data(group_by="county"). Only (county, month) pairs with
+    outbreaks are kept, sorted by integer FIPS and month, so memory grows with
+    the affected counties rather than with every county times every month.
+    County labels are resolved once here instead of on every slider move.
+    """
+    rows = county_grouped.assign(fips=pd.to_numeric(county_grouped["fips"], errors="coerce"))
+    rows = rows.dropna(subset=["fips", "Month"]).sort_values(["Month", "fips"])
+    rows["fips"] = rows["fips"].astype("int32")
+
+    months = pd.DatetimeIndex(rows["Month"].unique()).sort_values()
+    rows["month_idx"] = months.get_indexer(rows["Month"])
+
+    events = rows.groupby(["fips", "month_idx"])["Flock Size"].sum().reset_index()
+    counties = events["fips"].unique()
+    county_idx = np.searchsorted(counties, events["fips"].to_numpy())
+
+    store = {
+        "months": months,
+        "labels": [m.strftime("%b %Y") for m in months],
+        "fips": counties,
+        "event_county": county_idx,
+        # Events sorted by (county, month) under one integer key for searchsorted
+        "event_key": county_idx.astype("int64") * len(months) + events["month_idx"].to_numpy(),
+        "event_total": events.groupby("fips")["Flock Size"].cumsum().to_numpy(dtype=float),
+        "county_names": None,
+        "state_names": None,
+    }
+    store["index"] = {label: i for i, label in enumerate(store["labels"])}
+
+    for col, key in (("County", "county_names"), ("State", "state_names")):
+        if col in rows.columns:
+            names = rows.groupby("fips")[col].first()
+            store[key] = names.reindex(counties).astype(str).to_numpy()
+    return store
+
+
+def _county_totals(store, m):
+    """
+    Returns (running total per county up to month index m, mask of counties with an outbreak by then).
+    """
+    county = np.arange(len(store["fips"]))
+    totals = np.zeros(len(county))
+    if m < 0:
+        return totals, totals > 0
+
+    # Latest event at or before month m for each county
+    pos = np.searchsorted(store["event_key"], county * len(store["months"]) + m, side="right") - 1
+    pos_safe = np.clip(pos, 0, None)
+    found = (pos >= 0) & (store["event_county"][pos_safe] == county)
+    totals[found] = store["event_total"][pos_safe[found]]
+    return totals, found
+
+
+def county_store_view(store, month_label):
+    """
+    Returns running flock-death totals up to and including month_label for
+    every county with an outbreak so far, with zero-padded FIPS strings that
+    match the county GeoJSON ids.
+    """
+    totals, found = _county_totals(store, store["index"][month_label])
+
+    view = pd.DataFrame({
+        "fips": pd.Series(store["fips"][found]).astype(str).str.zfill(5),
+        "Flock Size": totals[found],
+    })
+    if store["county_names"] is not None:
+        view["CountyName"] = store["county_names"][found]
+    return view
+
+
+# === WINDOWED LEADERBOARDS ===
+def _window_bounds(months, start_label, end_label):
+    """
+    Maps month labels to (first, last) positions on a month axis. Labels
+    need not be on the axis, so cubes and stores with different months
+    can share one window.
+    """
+    start_month = pd.to_datetime(start_label, format="%b %Y")
+    end_month = pd.to_datetime(end_label, format="%b %Y")
+    if start_month > end_month:
+        raise ValueError(f"Window starts after it ends: {start_label} > {end_label}")
+    start = int(np.searchsorted(months, start_month, side="left"))
+    end = int(np.searchsorted(months, end_month, side="right")) - 1
+    return start, end
+
+
+def top_k(names, values, k=20):
+    """
+    Returns the k (name, value) pairs with the largest positive values, largest first.
+    """
+    largest = heapq.nlargest(k, ((v, n) for n, v in zip(names, values) if v > 0))
+    return [(n, v) for v, n in largest]
+
+
+def state_cube_window(cube, start_label, end_label, measure="Flock Size"):
+    """
+    Returns per-state totals of a cube measure between two months (inclusive)
+    as the difference of two cumulative snapshots.
+    """
+    start, end = _window_bounds(cube["months"], start_label, end_label)
+    totals = np.zeros(len(cube["states"]))
+    if end >= start:
+        totals += cube[measure][end]
+        if start > 0:
+            totals -= cube[measure][start - 1]
+    return totals
+
+
+def county_store_window(store, start_label, end_label):
+    """
+    Returns per-county flock deaths between two months (inclusive)
+    as the difference of two cumulative snapshots.
+    """
+    start, end = _window_bounds(store["months"], start_label, end_label)
+    if end < start:
+        return np.zeros(len(store["fips"]))
+    return _county_totals(store, end)[0] - _county_totals(store, start - 1)[0]
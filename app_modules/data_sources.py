@@ -0,0 +1,147 @@
+# app_modules/data_sources.py
+
+import os
+import threading
+import duckdb
+import pandas as pd
+from .helper_modules import artifacts
+from .helper_modules.artifacts import write_artifact
+from .query_builder import compile_query, query_columns
+
+# Backend used by query_table: "bigquery", "duckdb" (local Parquet) or "memory"
+DATA_SOURCE_ENV = "CHICKEN_EGG_DATA_SOURCE"
+DEFAULT_DATA_SOURCE = "bigquery"
+DATA_SOURCE_NAMES = ("bigquery", "duckdb", "memory")
+
+LOCAL_DATA_DIR = "app_data"
+
+# Committed CSV snapshot of each table, used only to seed its Parquet
+# artifact (see helper_modules.artifacts) when the ETL has not written one
+LOCAL_TABLES = {
+    "bird_flu": "bird_flu.csv",
+    "wild_birds": "prep_data/wild_birds.csv",
+    "egg_prices": "cleaned_egg_prices.csv",
+    "calmaine": "calmaine_stock.csv",
+    "vitl": "vitl_stock.csv",
+    "post": "post_stock.csv",
+}
+
+_duckdb = duckdb.connect()
+_store_lock = threading.Lock()
+_memory_tables = {}
+_memory_versions = {}
+
+
+def get_data_source(source=None):
+    """
+    Returns the backend name to query, falling back to the
+    CHICKEN_EGG_DATA_SOURCE env var and then to BigQuery.
+    """
+    source = (source or os.getenv(DATA_SOURCE_ENV) or DEFAULT_DATA_SOURCE).lower()
+    if source not in DATA_SOURCE_NAMES:
+        raise ValueError(f"Unknown data source '{source}'. Use one of {DATA_SOURCE_NAMES}")
+    return source
+
+
+# === LOCAL PARQUET STORE ===
+def local_table_path(table_name):
+    """
+    Returns the typed Parquet artifact for a table, seeding it from the
+    committed CSV when it is missing. An existing artifact is never
+    replaced: the CSVs are snapshots and the ETL output is newer. Raises
+    ValueError when the CSV lacks a schema column.
+    """
+    if table_name not in LOCAL_TABLES:
+        raise ValueError(f"No local data for table {table_name}")
+
+    csv_path = os.path.join(LOCAL_DATA_DIR, LOCAL_TABLES[table_name])
+    parquet_path = artifacts.artifact_path(table_name)
+
+    with _store_lock:
+        if not os.path.exists(parquet_path):
+            write_artifact(table_name, pd.read_csv(csv_path))
+            print(f"Seeded local table '{table_name}' from {csv_path}")
+
+    return parquet_path
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def local_table_versions():
+    """
+    Returns {table: artifact mtime} for the local store, from file
+    metadata only, so a new ETL output changes the version.
+    """
+    return {name: _mtime(artifacts.artifact_path(name)) for name in LOCAL_TABLES}
+
+
+def build_local_store(tables=None):
+    """
+    Makes sure every table has a Parquet artifact for the duckdb data source.
+    """
+    return {name: local_table_path(name) for name in (tables or LOCAL_TABLES)}
+
+
+# === IN-MEMORY TABLES ===
+def register_memory_table(table_name, df):
+    """
+    Makes a DataFrame queryable under table_name with the memory data source.
+    """
+    _memory_tables[table_name] = df.copy()
+    _memory_versions[table_name] = _memory_versions.get(table_name, 0) + 1
+
+
+def clear_memory_tables():
+    _memory_tables.clear()
+
+
+def memory_table_versions():
+    """
+    Returns {table: how many times it was registered}, so re-registering a table changes its version.
+    """
+    return dict(_memory_versions)
+
+
+# === QUERIES ===
+def _run_local(cursor, relation, table_name, query):
+    needed = query_columns(**query)
+    if needed is not None:
+        all_columns = cursor.execute(f"DESCRIBE SELECT * FROM {relation}").df()["column_name"].tolist()
+        missing = [col for col in needed if col not in all_columns]
+        if missing:
+            raise ValueError(f"Columns not found in table {table_name}: {missing}")
+
+    sql, params = compile_query(relation, "duckdb", **query)
+    return cursor.execute(sql, params).df()
+
+
+def query_duckdb(table_name, **query):
+    """
+    Runs a query (see query_builder.compile_query) against the local Parquet store with DuckDB.
+    """
+    path = local_table_path(table_name).replace("'", "''")
+    cursor = _duckdb.cursor()
+    try:
+        return _run_local(cursor, f"read_parquet('{path}')", table_name, query)
+    finally:
+        cursor.close()
+
+
+def query_memory(table_name, **query):
+    """
+    Runs a query (see query_builder.compile_query) against a table registered with register_memory_table.
+    """
+    if table_name not in _memory_tables:
+        raise ValueError(f"No in-memory table named {table_name}")
+
+    cursor = _duckdb.cursor()
+    try:
+        cursor.register("memory_table", _memory_tables[table_name])
+        return _run_local(cursor, "memory_table", table_name, query)
+    finally:
+        cursor.close()
@@ -1,99 +1,161 @@
+import threading
 import pandas as pd
-from .helper_modules.geodata import add_state_abbreviations, merge_with_fips, merge_with_geolocation, has_geospatial_columns, ensure_geospatial
-from .query_gbq import query_table
+from .cumulative import (
+    build_county_store,
+    build_state_cube,
+    county_store_window,
+    extend_state_cube,
+    state_cube_window,
+    top_k,
+)
+from .helper_modules.compact import compact_frame
+from .helper_modules.geodata import ensure_geospatial
+from .profiler import profiled
+from .query_gbq import QueryBudgetExceeded, cache_by_data_version, query_table
 from google.api_core.exceptions import GoogleAPIError
-import streamlit as st
 
 REQUIRED_GEO_COLS = ["fips", "lat", "lng"]
 
+# The dashboards start in 2022, so older rows are filtered out in the query
+DASHBOARD_START = "2022-01-01"
+
+# Last cube built per (bird flu table, wild bird table), extended on refresh
+_state_cubes = {}
+_state_cube_lock = threading.Lock()
+
 
 # This filepath will be used later for the National Ag. Stats Service API
 #file_path = "https://quickstats.nass.usda.gov/results/AE779404-2B32-375F-B3FE-F48335DE30EC"
 
-@st.cache_data(ttl=3600)
-def prep_wild_bird_data(table_name="wild_birds"):
-    """
-    Cleans wild bird data and adds geospatial data.
-    Returns a df with a 'lat' and 'lng' column for mapping.
-    """
-    # Load the wild bird data
-    wild_bird_data = query_table(
-        table_name,
-        columns = ["State", "County", "Date Detected", "Bird Species"])
-    
-    # Formatting columns (GET RID OF THIS)
-    wild_bird_data['State'] = wild_bird_data['State'].str.title()
-    
-    # Daily column = 'Date'
-    wild_bird_data['Date'] = pd.to_datetime(
-        wild_bird_data['Date Detected'], errors='coerce'
-        ).dt.to_period("M").dt.to_timestamp()
-
-    # Monthly column = 'Month'
-    wild_bird_data['Month'] = wild_bird_data['Date'].dt.to_period("M").dt.to_timestamp()
+# Rollups pushed down to the data source, by prep_bird_flu_data group_by
+BIRD_FLU_GROUPS = {
+    "none": ["Outbreak Date"],
+    "state": ["Month", "State"],
+    "county": ["Month", "State", "County", "fips"],
+}
+BIRD_FLU_AGGREGATES = {
+    "Flock Size": ("sum", "Flock Size"),
+    "lat": ("avg", "lat"),
+    "lng": ("avg", "lng"),
+}
 
-    # Ensure that required columns exist
-    required_columns = {"State", "County"}
-    missing_columns = required_columns - set(wild_bird_data.columns)
-    if missing_columns:
-        raise KeyError(f"Missing required columns: {missing_columns}")
 
-    wild_bird_geo = ensure_geospatial(wild_bird_data, source_name="wild_birds")
+def _title_case_groups(grouped, group_fields, aggregations):
+    """
+    Title-cases State/County on already aggregated rows and merges any
+    groups that only differed by case.
+    """
+    for col in ("State", "County"):
+        if col in grouped.columns:
+            grouped[col] = grouped[col].str.title()
+    if grouped.duplicated(group_fields).any():
+        grouped = grouped.groupby(group_fields).agg(aggregations).reset_index()
+    return grouped
 
 
-    # Validate that the resulting DataFrame contains 'lat' and 'lng'
-    if "lat" not in wild_bird_geo.columns.tolist() or "lng" not in wild_bird_geo.columns.tolist():
-        raise KeyError("Missing required columns: 'lat' and 'lng'")   
-    
-    wild_grouped = wild_bird_geo.groupby(['Month', 'State']).size().reset_index(name='Wild Count')
+@profiled("prep")
+@cache_by_data_version(tables=["table_name"])
+def prep_wild_bird_data(table_name="wild_birds", start_date=None, end_date=None, states=None):
+    """
+    Counts wild bird detections per month and state.
+    The group-by and the optional date window/state filter run in the
+    data source, so only aggregated rows come back.
+    """
+    wild_grouped = query_table(
+        table_name,
+        group_by=["Month", "State"],
+        aggregates={"Wild Count": ("count", "*")},
+        month="Date Detected",
+        date_from=start_date,
+        date_to=end_date,
+        states=states)
+
+    # Rows without a detection date or state are dropped, as a pandas groupby would
+    wild_grouped = wild_grouped.dropna(subset=["Month", "State"]).copy()
+    wild_grouped["Month"] = pd.to_datetime(wild_grouped["Month"])
+    wild_grouped = _title_case_groups(wild_grouped, ["Month", "State"], {"Wild Count": "sum"})
+
+    wild_grouped = wild_grouped.sort_values(["Month", "State"]).reset_index(drop=True)
     wild_grouped['Month_str'] = wild_grouped['Month'].dt.strftime("%b %Y")
 
     # Extract valid states for filtering geojson
     valid_states = wild_grouped['State'].unique().tolist() 
 
+    return compact_frame(wild_grouped), valid_states
 
 
-    return wild_grouped, valid_states
+def _finish_bird_flu_rollup(grouped, group_by):
+    """
+    Formats bird flu rows aggregated by the data source like the pandas path below.
+    """
+    group_fields = BIRD_FLU_GROUPS[group_by]
+    grouped = grouped.dropna(subset=group_fields).copy()
+    grouped["Flock Size"] = grouped["Flock Size"].fillna(0).astype("int64")
+
+    if group_by == "none":
+        grouped = grouped.rename(columns={"Outbreak Date": "Date"})
+        grouped["Date"] = pd.to_datetime(grouped["Date"])
+        return grouped[["Date", "Flock Size"]].sort_values("Date").reset_index(drop=True)
 
+    grouped["Month"] = pd.to_datetime(grouped["Month"])
+    grouped = _title_case_groups(grouped, group_fields, {"Flock Size": "sum", "lat": "mean", "lng": "mean"})
+    grouped = grouped.sort_values(group_fields).reset_index(drop=True)
+    grouped["Month_str"] = grouped["Month"].dt.strftime("%b %Y")
+    return compact_frame(grouped)
 
-@st.cache_data(ttl=3600)
+
+@profiled("prep")
+@cache_by_data_version(tables=["table_name"])
 def prep_bird_flu_data(table_name="bird_flu",
                        bird_flu_data=None, 
                        use_bigquery=True,
-                       group_by="state"): 
+                       group_by="state",
+                       start_date=None,
+                       end_date=None,
+                       states=None): 
     '''
     Loads and cleans bird flu data
-    group_by_state=True indicates function will be used for map
-    Returns either monthly aggregated data or geospatially grouped data by state. 
+    group_by="state"/"county" indicates function will be used for map
+    Returns either daily totals (group_by="none") or data grouped by month and state/county.
+    From BigQuery the grouping and the start_date/end_date/states filters run in the
+    warehouse; files and DataFrames are grouped in pandas.
     '''
+    if group_by not in BIRD_FLU_GROUPS:
+        raise ValueError("group_by must be 'none', 'state' or 'county'")
 
-    selected_cols = ["Outbreak Date", "Flock Size"]
-    if group_by == "state":
-        selected_cols += ["State", "lat", "lng"]
-    if group_by == "county":
-        selected_cols += ["State", "County", "fips", "lat", "lng"]
-
-    bird_flu_raw = None
     if use_bigquery:
         try:
-            bird_flu_raw = query_table(table_name, columns=selected_cols)
-            if bird_flu_raw is not None:
-                    bird_flu_raw = bird_flu_raw.copy()        
-                    print("Loaded bird flu data from BigQuery.")
+            grouped = query_table(
+                table_name,
+                group_by=BIRD_FLU_GROUPS[group_by],
+                aggregates={"Flock Size": BIRD_FLU_AGGREGATES["Flock Size"]} if group_by == "none" else BIRD_FLU_AGGREGATES,
+                month="Outbreak Date",
+                date_from=start_date,
+                date_to=end_date,
+                states=states)
+            print("Loaded aggregated bird flu data from BigQuery.")
+            return _finish_bird_flu_rollup(grouped, group_by)
+        except QueryBudgetExceeded:
+            # A refusal, not a failure: the fallback would only hide it
+            raise
         except GoogleAPIError as e:
             print(f"BigQuery failed: {e}")
         except Exception as e:
             print(f"Unknown error pulling from BigQuery: {e}")
-    
+
+    selected_cols = ["Outbreak Date", "Flock Size"]
+    if group_by == "state":
+        selected_cols += ["State", "lat", "lng"]
+    if group_by == "county":
+        selected_cols += ["State", "County", "fips", "lat", "lng"]
 
     # Read the bird flu data from the provided file or DataFrame
-    if bird_flu_raw is None:
-        if isinstance(bird_flu_data, str):
-            bird_flu_raw = pd.read_csv(bird_flu_data, usecols=selected_cols)
-        elif isinstance(bird_flu_data, pd.DataFrame):
-            bird_flu_raw = bird_flu_data[selected_cols].copy()
-        else:
-            raise ValueError("No data source")
+    if isinstance(bird_flu_data, str):
+        bird_flu_raw = pd.read_csv(bird_flu_data, usecols=selected_cols)
+    elif isinstance(bird_flu_data, pd.DataFrame):
+        bird_flu_raw = bird_flu_data[selected_cols].copy()
+    else:
+        raise ValueError("No data source")
 
     # Column validation
     missing_columns = set(selected_cols) - set(bird_flu_raw.columns)
@@ -130,13 +192,7 @@ def prep_bird_flu_data(table_name="bird_flu",
     bird_flu_geo["lng"] = pd.to_numeric(bird_flu_geo["lng"], errors="coerce")
 
     
-    if group_by == "state":
-        group_fields = ["Month", "State"]
-    elif group_by == "county":
-        group_fields = ["Month", "State", "County", "fips"]
-    else:
-        raise ValueError("group_by must be either 'state' or 'county'")
-
+    group_fields = BIRD_FLU_GROUPS[group_by]
     grouped_bird_flu = bird_flu_geo.groupby(group_fields).agg({
         "Flock Size": "sum",
         "lat": "mean",
@@ -147,9 +203,106 @@ def prep_bird_flu_data(table_name="bird_flu",
     month_str_map = bird_flu_raw[["Month", "Month_str"]].drop_duplicates()
     grouped_bird_flu = grouped_bird_flu.merge(month_str_map, on="Month", how="left")
     
-    return grouped_bird_flu
+    return compact_frame(grouped_bird_flu)
+
+
+@profiled("prep")
+@cache_by_data_version(tables=["bird_flu_table", "wild_bird_table"])
+def prep_outbreak_totals(bird_flu_table="bird_flu", wild_bird_table="wild_birds"):
+    """
+    Returns the tab 2 headline numbers, each computed by a single aggregate
+    query instead of summing the prepped frames again.
+    """
+    flock = query_table(bird_flu_table, aggregates={"Flock Size": ("sum", "Flock Size")})
+    wild = query_table(
+        wild_bird_table,
+        aggregates={
+            "Wild Count": ("count", "Date Detected"),
+            "Latest": ("max", "Date Detected"),
+        })
+
+    latest = pd.to_datetime(wild["Latest"].iloc[0])
+    return {
+        "total_chicken_deaths": int(flock["Flock Size"].fillna(0).iloc[0]),
+        "total_wild_bird_infections": int(wild["Wild Count"].iloc[0]),
+        "latest_wild_bird_month": latest.strftime("%b %Y") if pd.notna(latest) else "n/a",
+    }
+
+@profiled("prep")
+@cache_by_data_version(tables=["bird_flu_table", "wild_bird_table"])
+def prep_state_cube(bird_flu_table="bird_flu", wild_bird_table="wild_birds"):
+    """
+    Builds the cumulative month x state cube behind the wild bird map slider.
+    Tables are append-only (see app_bigquery/load_type.md), so once a cube
+    exists a refresh only reloads its last month and anything newer and
+    extends the previous cube instead of rebuilding it.
+    """
+    key = (bird_flu_table, wild_bird_table)
+    with _state_cube_lock:
+        cube = _state_cubes.get(key)
+
+    if cube is None or len(cube["months"]) == 0:
+        flock_grouped = prep_bird_flu_data(bird_flu_table, group_by="state")
+        wild_grouped, _ = prep_wild_bird_data(wild_bird_table)
+        cube = build_state_cube(flock_grouped, wild_grouped)
+    else:
+        since = cube["months"][-1]
+        flock_grouped = prep_bird_flu_data(bird_flu_table, group_by="state", start_date=since)
+        wild_grouped, _ = prep_wild_bird_data(wild_bird_table, start_date=since)
+        cube = extend_state_cube(cube, flock_grouped, wild_grouped)
+
+    with _state_cube_lock:
+        _state_cubes[key] = cube
+    return cube
+
+
+@profiled("prep")
+@cache_by_data_version(tables=["table_name"])
+def prep_county_store(table_name="bird_flu"):
+    """
+    Builds the sparse cumulative county store behind the county choropleth slider.
+    """
+    return build_county_store(prep_bird_flu_data(table_name, group_by="county"))
+
+
+@profiled("prep")
+def prep_outbreak_leaderboard(level="county", start_month=None, end_month=None, k=20,
+                              bird_flu_table="bird_flu", wild_bird_table="wild_birds"):
+    """
+    Returns the top k states or counties by flock deaths between two months
+    (labels like "Jan 2024", inclusive; defaults to all months).
+    Each window is the difference of two cumulative snapshots, so no raw rows are read.
+    """
+    if level == "state":
+        data = prep_state_cube(bird_flu_table, wild_bird_table)
+        names = data["states"]
+    elif level == "county":
+        data = prep_county_store(bird_flu_table)
+        names = data["fips"].astype(str)
+        if data["county_names"] is not None:
+            names = [f"{c}, {s}" for c, s in zip(data["county_names"], data["state_names"])]
+    else:
+        raise ValueError("level must be either 'state' or 'county'")
+
+    columns = ["Rank", level.title(), "Flock Deaths"]
+    if not data["labels"]:
+        return pd.DataFrame(columns=columns)
+
+    start_month = start_month or data["labels"][0]
+    end_month = end_month or data["labels"][-1]
+    if level == "state":
+        totals = state_cube_window(data, start_month, end_month)
+    else:
+        totals = county_store_window(data, start_month, end_month)
+
+    leaders = top_k(names, totals, k)
+    return pd.DataFrame(
+        [(rank, name, int(value)) for rank, (name, value) in enumerate(leaders, start=1)],
+        columns=columns)
+
 
-@st.cache_data(ttl=3600)
+@profiled("prep")
+@cache_by_data_version(tables=["table_name"])
 def prep_egg_price_data(
     egg_price_data='https://raw.githubusercontent.com/advanced-computing/chicken_egg/main/app_data/egg_price_monthly.csv',
     use_bigquery=True,
@@ -181,14 +334,16 @@ def prep_egg_price_data(
 
     return df
 
-@st.cache_data(ttl=3600)
+@profiled("prep")
+@cache_by_data_version(tables=["table_names"])
 def prep_stock_price_data(
     use_bigquery=True,
-    table_names=["calmaine", "vitl", "post"]):
+    table_names=["calmaine", "vitl", "post"],
+    start_date=DASHBOARD_START):
     '''
     Loads and cleans stock data
     returns df that can be used for time-sereis viz
-    Note: data is daily
+    Note: data is daily, and only rows from start_date on are queried
     Please use 'Close_Last' for timeseries
     '''
 
@@ -197,7 +352,7 @@ def prep_stock_price_data(
     
     for name in table_names:
         try:
-            df = query_table(name, columns = ["Date", "Close_Last"])
+            df = query_table(name, columns = ["Date", "Close_Last"], date_from=start_date)
             print(f"Loaded stock price data for '{name}' from BigQuery.")
         except GoogleAPIError as e:
             print(f"BigQuery failed for '{name}': {e}")
@@ -216,7 +371,7 @@ def prep_stock_price_data(
         # resampling prior to loading
         df = df.set_index("Date").resample("M").mean(numeric_only=True).reset_index()        
         
-        processed_dfs[name] = df
+        processed_dfs[name] = compact_frame(df)
     
     return processed_dfs["calmaine"], processed_dfs["vitl"], processed_dfs["post"]
 
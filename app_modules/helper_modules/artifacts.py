@@ -0,0 +1,191 @@
+import hashlib
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .normalize import pad_fips, strip_currency, to_dates
+
+# Typed Parquet files handed from the clean stages to the uploaders and the
+# local duckdb store, one per table
+ARTIFACT_DIR = "app_data/parquet"
+
+# Set to 1 to also write the legacy CSV next to each artifact
+EXPORT_CSV_ENV = "CHICKEN_EGG_EXPORT_CSV"
+
+_STOCK_SCHEMA = pa.schema([
+    pa.field("Date", pa.date32(), nullable=False),
+    ("Close_Last", pa.float64()),
+    ("Volume", pa.int64()),
+    ("Open", pa.float64()),
+    ("High", pa.float64()),
+    ("Low", pa.float64()),
+])
+
+# Column types of every artifact. Non-nullable fields must be set on every row.
+ARTIFACT_SCHEMAS = {
+    "bird_flu": pa.schema([
+        ("County", pa.string()),
+        ("State", pa.string()),
+        pa.field("Outbreak Date", pa.date32(), nullable=False),
+        ("Flock Type", pa.string()),
+        ("Flock Size", pa.int64()),
+        ("State Abbrev", pa.string()),
+        ("fips", pa.string()),
+        ("lng", pa.float64()),
+        ("lat", pa.float64()),
+    ]),
+    "wild_birds": pa.schema([
+        ("State", pa.string()),
+        ("County", pa.string()),
+        pa.field("Date Detected", pa.date32(), nullable=False),
+        ("Bird Species", pa.string()),
+    ]),
+    "egg_prices": pa.schema([
+        pa.field("Date", pa.date32(), nullable=False),
+        ("Avg_Price", pa.float64()),
+    ]),
+    "calmaine": _STOCK_SCHEMA,
+    "vitl": _STOCK_SCHEMA,
+    "post": _STOCK_SCHEMA,
+}
+
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def artifact_path(table_name):
+    return os.path.join(ARTIFACT_DIR, f"{table_name}.parquet")
+
+
+def _source_record_path(table_name):
+    # sha256 of the download an artifact was built from, written after the artifact
+    return f"{artifact_path(table_name)}.source"
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_built_from(table_name, source_file):
+    """
+    Returns whether the table's artifact was last written successfully from
+    exactly this source file. A failed clean leaves the old record, so the
+    next run rebuilds even when the download itself is not modified.
+    """
+    try:
+        with open(_source_record_path(table_name), encoding="utf-8") as f:
+            recorded = f.read().strip()
+    except OSError:
+        return False
+    return os.path.exists(artifact_path(table_name)) and recorded == _file_sha256(source_file)
+
+
+def _conform_column(name, values, arrow_type):
+    if pa.types.is_date(arrow_type):
+        return to_dates(values)
+    if pa.types.is_integer(arrow_type):
+        return strip_currency(values).round().astype("Int64")
+    if pa.types.is_floating(arrow_type):
+        return strip_currency(values)
+    if name == "fips":
+        return pad_fips(values)
+    return values.astype("string")
+
+
+def to_artifact_table(table_name, df, partial=False):
+    """
+    Converts a frame to an Arrow table with the artifact's schema, coercing
+    each column to its declared type. Raises ValueError for missing columns
+    (unless partial, which keeps only the schema columns present) or for
+    nulls in non-nullable columns.
+    """
+    schema = ARTIFACT_SCHEMAS[table_name]
+    missing = [name for name in schema.names if name not in df.columns]
+    if partial:
+        schema = pa.schema([field for field in schema if field.name in df.columns])
+    elif missing:
+        raise ValueError(f"Artifact {table_name} is missing columns: {missing}")
+
+    conformed = pd.DataFrame({
+        field.name: _conform_column(field.name, df[field.name], field.type) for field in schema
+    })
+    for field in schema:
+        if not field.nullable and conformed[field.name].isna().any():
+            raise ValueError(f"Artifact {table_name} has empty or unparseable {field.name} values")
+    return pa.Table.from_pandas(conformed, schema=schema, preserve_index=False)
+
+
+def write_artifact_chunks(table_name, chunks, csv_path=None, partial=False, source_file=None):
+    """
+    Streams frames into a table's Parquet artifact, one schema-checked row
+    group per frame, so only one frame is held at a time. Returns the path.
+    csv_path is only written when CHICKEN_EGG_EXPORT_CSV=1. When the frames
+    come from a downloaded source_file, its hash is recorded once the
+    artifact is in place (see is_built_from).
+    """
+    path = artifact_path(table_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    export_csv = csv_path and os.getenv(EXPORT_CSV_ENV) == "1"
+    csv_tmp_path = f"{csv_path}.tmp" if export_csv else None
+
+    # Both files are written beside their targets and renamed into place only
+    # once every chunk passed the schema check, so a failure replaces neither
+    writer, rows = None, 0
+    try:
+        try:
+            for i, df in enumerate(chunks):
+                table = to_artifact_table(table_name, df, partial=partial)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+                rows += table.num_rows
+                if export_csv:
+                    table.to_pandas().to_csv(csv_tmp_path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            pq.write_table(ARTIFACT_SCHEMAS[table_name].empty_table(), tmp_path)
+    except BaseException:
+        for leftover in (tmp_path, csv_tmp_path):
+            if leftover and os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+
+    os.replace(tmp_path, path)
+    if export_csv and os.path.exists(csv_tmp_path):
+        os.replace(csv_tmp_path, csv_path)
+    if source_file:
+        record_path = _source_record_path(table_name)
+        with open(f"{record_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(_file_sha256(source_file))
+        os.replace(f"{record_path}.tmp", record_path)
+    print(f"Wrote {rows} rows to {path}")
+    if export_csv:
+        print(f"Exported {csv_path}")
+    return path
+
+
+def write_artifact(table_name, df, csv_path=None, partial=False, source_file=None):
+    """
+    Writes a schema-checked Parquet artifact for a table and returns its path.
+    csv_path is only written when CHICKEN_EGG_EXPORT_CSV=1.
+    """
+    return write_artifact_chunks(table_name, [df], csv_path=csv_path, partial=partial, source_file=source_file)
+
+
+def read_artifact(table_name, columns=None):
+    """
+    Reads an artifact as an Arrow table, checking it still has the declared schema.
+    """
+    table = pq.read_table(artifact_path(table_name), columns=columns)
+    expected = ARTIFACT_SCHEMAS[table_name]
+    for field in table.schema:
+        if field.type != expected.field(field.name).type:
+            raise ValueError(f"Artifact {table_name} column {field.name} is {field.type}, expected {expected.field(field.name).type}")
+    return table
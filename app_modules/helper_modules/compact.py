@@ -0,0 +1,43 @@
+import pandas as pd
+
+# Column dtypes of the frames returned by the prep_* functions. st.cache_data
+# pickles and copies these frames on every hit, so repeated labels are
+# categoricals and numbers use the narrowest type that holds them.
+PREP_DTYPES = {
+    "State": "category",
+    "County": "category",
+    "State Abbrev": "category",
+    "Bird Species": "category",
+    "Month_str": "category",
+    "fips": "Int32",      # nullable int32; maps re-pad it to 5 digits
+    "lat": "float32",
+    "lng": "float32",
+    "Close_Last": "float32",
+    "MonthKey": "int16",
+}
+
+
+def month_key(months):
+    """
+    Returns months as int16 counts since year 0 (year * 12 + month - 1),
+    which sort and subtract like the months themselves.
+    """
+    months = pd.DatetimeIndex(months)
+    return pd.Index(months.year * 12 + months.month - 1).astype("int16")
+
+
+def compact_frame(df):
+    """
+    Casts the PREP_DTYPES columns present in df in place, adding MonthKey
+    next to a Month column, and returns df.
+    """
+    if "Month" in df.columns and len(df) and df["Month"].notna().all():
+        df["MonthKey"] = month_key(df["Month"]).to_numpy()
+    for col, dtype in PREP_DTYPES.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if col == "fips":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
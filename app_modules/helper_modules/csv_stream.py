@@ -0,0 +1,42 @@
+import csv
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Bytes of CSV parsed per chunk. Memory holds a few chunks at a time,
+# however long the file grows.
+CSV_BLOCK_BYTES = 1 << 20
+
+
+def csv_header(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def iter_csv_chunks(path, columns, block_size=CSV_BLOCK_BYTES):
+    """
+    Yields a CSV as DataFrames of about block_size bytes each, holding only
+    `columns` (matched after stripping the header) as strings. Blocks are
+    parsed by pyarrow's multithreaded reader while the previous chunk is
+    transformed. Raises ValueError if a column is missing.
+    """
+    names = {name.strip(): name for name in csv_header(path)}
+    missing = [col for col in columns if col not in names]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {missing}")
+
+    raw = [names[col] for col in columns]
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=block_size, use_threads=True),
+        # Strings throughout, so a later block cannot disagree with the
+        # types inferred from the first one
+        convert_options=pacsv.ConvertOptions(
+            include_columns=raw,
+            column_types={name: pa.string() for name in raw},
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        df = batch.to_pandas()
+        df.columns = columns
+        yield df
@@ -0,0 +1,119 @@
+import functools
+import json
+import os
+import threading
+from .http_fetch import download_file
+
+# Shape files served to the map functions: local path, where to fetch it
+# if the file is not on disk yet, and the feature property used as its id
+GEO_ASSETS = {
+    "states": {
+        "path": "app_data/us_states.geojson",
+        "url": "https://raw.githubusercontent.com/advanced-computing/chicken_egg/main/app_data/us_states.geojson",
+        "id": "NAME",
+    },
+    "counties": {
+        "path": "app_data/geojson-counties-fips.json",
+        "url": "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json",
+        "id": None,  # counties use the top-level feature id (FIPS)
+    },
+}
+
+# Simplified copies built offline by geo_simplify, one file per level of detail
+LOD_DIR = "app_data/geo_lod"
+
+# Coarsest level that still looks identical up to each map zoom
+LOD_ZOOM_LEVELS = [(4, "low"), (7, "medium")]
+
+_download_lock = threading.Lock()
+
+
+def _feature_id(feature, id_property):
+    if id_property is None:
+        return str(feature.get("id"))
+    return str(feature["properties"].get(id_property))
+
+
+def _ensure_local(asset):
+    """
+    Returns the local path of an asset, downloading it once if it is not on disk.
+    """
+    path = asset["path"]
+    with _download_lock:
+        if not os.path.exists(path):
+            print(f"Downloading {asset['url']} to {path}")
+            download_file(asset["url"], path)
+    return path
+
+
+def lod_path(name, lod):
+    return os.path.join(LOD_DIR, f"{name}_{lod}.json")
+
+
+def lod_for_zoom(zoom):
+    """
+    Picks the level of detail ("low", "medium" or "full") for a map zoom.
+    """
+    for max_zoom, lod in LOD_ZOOM_LEVELS:
+        if zoom <= max_zoom:
+            return lod
+    return "full"
+
+
+def load_geo_asset(name, lod="full"):
+    """
+    Parses a shape file once per process and indexes its features by id.
+    lod picks a simplified copy from app_data/geo_lod/, falling back to
+    the full-resolution file when that level has not been built.
+    Returns {"geojson": FeatureCollection, "features": {id: feature}, "id": id property}.
+    The returned objects are shared, so callers must not modify them.
+    """
+    return _load_geo_asset(name, lod)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_geo_asset(name, lod):
+    if name not in GEO_ASSETS:
+        raise ValueError(f"Unknown geo asset '{name}'. Use one of {list(GEO_ASSETS)}")
+
+    asset = GEO_ASSETS[name]
+    path = lod_path(name, lod) if lod != "full" else None
+    if path is None or not os.path.exists(path):
+        if path is not None:
+            print(f"No '{lod}' level for {name}, using full resolution")
+        path = _ensure_local(asset)
+
+    with open(path, encoding="utf-8") as f:
+        geojson = json.load(f)
+
+    features = {_feature_id(feature, asset["id"]): feature for feature in geojson["features"]}
+    return {"geojson": geojson, "features": features, "id": asset["id"]}
+
+
+@functools.lru_cache(maxsize=128)
+def _subset(name, ids, lod):
+    features = _load_geo_asset(name, lod)["features"]
+    return {
+        "type": "FeatureCollection",
+        "features": [features[i] for i in sorted(ids) if i in features],
+    }
+
+
+def geo_subset(name, ids=None, lod="full"):
+    """
+    Returns a FeatureCollection holding only the features whose id is in ids
+    (state names or FIPS strings), or every feature if ids is None, at the
+    given level of detail (see lod_for_zoom).
+    Subsets are cached, so repeated reruns reuse the same object.
+    """
+    if ids is None:
+        return _load_geo_asset(name, lod)["geojson"]
+    return _subset(name, frozenset(str(i) for i in ids), lod)
+
+
+def featureidkey(name):
+    """
+    Returns the featureidkey plotly needs to match locations to this asset's features.
+    """
+    id_property = GEO_ASSETS[name]["id"]
+    return "id" if id_property is None else f"properties.{id_property}"
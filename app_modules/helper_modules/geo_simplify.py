@@ -0,0 +1,197 @@
+"""
+Builds simplified, coordinate-quantized versions of the map shape files.
+
+Run from the repository root to (re)generate app_data/geo_lod/:
+    python -m app_modules.helper_modules.geo_simplify
+
+Borders shared by two shapes are simplified once and reused by both, so
+neighbouring states/counties still meet exactly after simplification.
+"""
+import json
+import os
+from collections import defaultdict
+import numpy as np
+
+from .geo_assets import GEO_ASSETS, LOD_DIR, lod_path
+
+# Level of detail -> Douglas-Peucker tolerance and rounding, both in degrees
+LOD_LEVELS = {
+    "low": {"tolerance": 0.05, "digits": 2},
+    "medium": {"tolerance": 0.01, "digits": 3},
+}
+
+
+def _polygons(geometry):
+    if geometry is None:
+        return []
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return [geometry["coordinates"]]
+
+
+def _quantize_ring(ring, digits):
+    """
+    Rounds a ring to a coordinate grid and drops repeated points.
+    """
+    points = []
+    for lng, lat in (p[:2] for p in ring):
+        point = (round(lng, digits), round(lat, digits))
+        if not points or points[-1] != point:
+            points.append(point)
+    if points[0] != points[-1]:
+        points.append(points[0])
+    return points
+
+
+def _quantize_polygon(polygon, digits):
+    """
+    Quantizes a polygon's rings. Holes that collapse are dropped; an outer
+    ring that collapses keeps two more decimals so small shapes stay on the map.
+    """
+    rings = [_quantize_ring(ring, digits) for ring in polygon]
+    if len(rings[0]) < 4:
+        rings[0] = _quantize_ring(polygon[0], digits + 2)
+        if len(rings[0]) < 4:
+            return []
+    return [rings[0]] + [ring for ring in rings[1:] if len(ring) >= 4]
+
+
+def _find_junctions(rings):
+    """
+    Points where shared borders start or end: a point is a junction when
+    the rings passing through it do not all share the same two neighbours.
+    """
+    neighbours = defaultdict(set)
+    for ring in rings:
+        open_ring = ring[:-1]
+        n = len(open_ring)
+        for i, point in enumerate(open_ring):
+            neighbours[point].add(frozenset((open_ring[i - 1], open_ring[(i + 1) % n])))
+    return {point for point, pairs in neighbours.items() if len(pairs) > 1}
+
+
+def _douglas_peucker(points, tolerance):
+    """
+    Returns the indices of points kept by Douglas-Peucker simplification.
+    """
+    coords = np.asarray(points, dtype=float)
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = coords[first], coords[last]
+        segment = coords[first + 1:last]
+        direction = end - start
+        length = np.hypot(*direction)
+        if length == 0:
+            distances = np.hypot(*(segment - start).T)
+        else:
+            offset = segment - start
+            distances = np.abs(direction[0] * offset[:, 1] - direction[1] * offset[:, 0]) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack += [(first, split), (split, last)]
+    return np.flatnonzero(keep)
+
+
+def _simplify_arc(arc, tolerance, cache):
+    # Arcs are simplified in a canonical direction so both shapes sharing
+    # a border get identical points
+    forward = tuple(arc) <= tuple(reversed(arc))
+    key = tuple(arc) if forward else tuple(reversed(arc))
+    if key not in cache:
+        cache[key] = [key[i] for i in _douglas_peucker(key, tolerance)]
+    return cache[key] if forward else cache[key][::-1]
+
+
+def _simplify_ring(ring, junctions, tolerance, cache):
+    open_ring = ring[:-1]
+    cuts = [i for i, point in enumerate(open_ring) if point in junctions]
+    if not cuts:
+        # Rings without junctions start at their smallest point, so an
+        # identical ring elsewhere is cut the same way
+        cuts = [min(range(len(open_ring)), key=open_ring.__getitem__)]
+
+    start = cuts[0]
+    rotated = open_ring[start:] + open_ring[:start] + [open_ring[start]]
+    offsets = [i - start for i in cuts] + [len(open_ring)]
+
+    simplified = [rotated[0]]
+    for a, b in zip(offsets, offsets[1:]):
+        simplified += _simplify_arc(rotated[a:b + 1], tolerance, cache)[1:]
+
+    # Tiny rings that would collapse keep their quantized points
+    return simplified if len(simplified) >= 4 else rotated
+
+
+def simplify_geojson(geojson, tolerance, digits, keep_properties=()):
+    """
+    Returns a copy of a Polygon/MultiPolygon FeatureCollection with
+    coordinates rounded to `digits` decimals and borders simplified with
+    `tolerance` (degrees), keeping shared borders identical between features.
+    Only keep_properties are copied, since plotly ships every property to the browser.
+    """
+    features = geojson["features"]
+    quantized = [[_quantize_polygon(polygon, digits) for polygon in _polygons(f["geometry"])] for f in features]
+    quantized = [[polygon for polygon in polygons if polygon] for polygons in quantized]
+    junctions = _find_junctions(ring for polygons in quantized for polygon in polygons for ring in polygon)
+
+    cache = {}
+    simplified_features = []
+    for feature, polygons in zip(features, quantized):
+        simplified = [
+            [[list(p) for p in _simplify_ring(ring, junctions, tolerance, cache)] for ring in polygon]
+            for polygon in polygons
+        ]
+        geometry = None
+        if simplified:
+            geometry = (
+                {"type": "Polygon", "coordinates": simplified[0]} if len(simplified) == 1
+                else {"type": "MultiPolygon", "coordinates": simplified}
+            )
+        out = {
+            "type": "Feature",
+            "properties": {k: feature["properties"][k] for k in keep_properties if k in feature["properties"]},
+            "geometry": geometry,
+        }
+        if "id" in feature:
+            out["id"] = feature["id"]
+        simplified_features.append(out)
+
+    return {"type": "FeatureCollection", "features": simplified_features}
+
+
+def build_lod_assets(names=None, levels=None):
+    """
+    Writes every level of detail for the shape files that exist locally
+    to app_data/geo_lod/ and returns {path: size in bytes}.
+    """
+    os.makedirs(LOD_DIR, exist_ok=True)
+    sizes = {}
+    for name in names or GEO_ASSETS:
+        asset = GEO_ASSETS[name]
+        if not os.path.exists(asset["path"]):
+            print(f"Skipping '{name}': {asset['path']} not found")
+            continue
+
+        with open(asset["path"], encoding="utf-8") as f:
+            geojson = json.load(f)
+        keep_properties = [asset["id"]] if asset["id"] else []
+
+        for level in levels or LOD_LEVELS:
+            simplified = simplify_geojson(geojson, keep_properties=keep_properties, **LOD_LEVELS[level])
+            path = lod_path(name, level)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(simplified, f, separators=(",", ":"))
+            sizes[path] = os.path.getsize(path)
+            print(f"Wrote {path}: {sizes[path] / 1e6:.2f} MB (full: {os.path.getsize(asset['path']) / 1e6:.2f} MB)")
+    return sizes
+
+
+if __name__ == "__main__":
+    build_lod_assets()
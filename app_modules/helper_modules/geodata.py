@@ -1,60 +1,118 @@
+import functools
+import numpy as np
 import pandas as pd
 
+# Local copies of the county lookup tables, loaded once per process
+FIPS_MASTER_PATH = "app_data/prep_data/state_and_county_fips_master.csv"
+CENTROIDS_PATH = "app_data/prep_data/cfips_location.csv"
+
+STATE_TO_ABBREV = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
+    "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "Florida": "FL", "Georgia": "GA",
+    "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA",
+    "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME", "Maryland": "MD",
+    "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS",
+    "Missouri": "MO", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH",
+    "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY", "North Carolina": "NC",
+    "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA",
+    "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD", "Tennessee": "TN",
+    "Texas": "TX", "Utah": "UT", "Vermont": "VT", "Virginia": "VA", "Washington": "WA",
+    "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY", "District of Columbia": "DC",
+}
+
+COUNTY_SUFFIXES = r" County| Borough| Parish"
+
+
+def normalize_county(names):
+    """
+    Returns lowercase county names without County/Borough/Parish, so
+    "McIntosh County" and "Mcintosh" map to the same key.
+    """
+    names = pd.Series(names, dtype="string")
+    return names.str.replace(COUNTY_SUFFIXES, "", regex=True).str.strip().str.lower()
+
+
+@functools.lru_cache(maxsize=None)
+def load_geodata_index(fips_path=FIPS_MASTER_PATH, centroids_path=CENTROIDS_PATH):
+    """
+    Builds the county lookup index once per process:
+    (normalized county, state abbrev) -> int FIPS -> (lat, lng).
+    The returned arrays are shared, so callers must not modify them.
+    """
+    fips_data = pd.read_csv(fips_path, dtype={"name": "string", "state": "string"})
+    fips_data = fips_data.dropna(subset=["state"])  # state and national rows have no state
+    keys = normalize_county(fips_data["name"]) + "|" + fips_data["state"]
+    first = ~keys.duplicated()
+
+    centroids = pd.read_csv(centroids_path).sort_values("cfips")
+    return {
+        "keys": pd.Index(keys[first].to_numpy()),
+        "fips": fips_data["fips"][first].to_numpy(dtype="int32"),
+        "centroid_fips": centroids["cfips"].to_numpy(dtype="int32"),
+        "lat": centroids["lat"].to_numpy(dtype=float),
+        "lng": centroids["lng"].to_numpy(dtype=float),
+    }
+
+
+def lookup_fips(counties, state_abbrevs, index=None):
+    """
+    Returns int FIPS codes for county names and state abbreviations (arrays
+    of equal length), with -1 where the county is not found.
+    """
+    index = index or load_geodata_index()
+    keys = normalize_county(counties) + "|" + pd.Series(state_abbrevs, dtype="string").to_numpy()
+    pos = index["keys"].get_indexer(keys.fillna("").to_numpy())
+    return np.where(pos >= 0, index["fips"][pos], -1)
+
+
+def lookup_centroids(fips, index=None):
+    """
+    Returns (lat, lng) arrays for FIPS codes (ints or strings, padded or not),
+    with NaN where the code has no centroid.
+    """
+    index = index or load_geodata_index()
+    codes = pd.to_numeric(pd.Series(fips), errors="coerce").fillna(-1).to_numpy(dtype="int64")
+
+    known = index["centroid_fips"]
+    pos = np.clip(np.searchsorted(known, codes), 0, len(known) - 1)
+    found = known[pos] == codes
+    lat = np.where(found, index["lat"][pos], np.nan)
+    lng = np.where(found, index["lng"][pos], np.nan)
+    return lat, lng
+
+
 # Step 1: Add state abbreviations
 def add_state_abbreviations(df):
-    state_to_abbrev = {
-        "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
-        "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "Florida": "FL", "Georgia": "GA",
-        "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA",
-        "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME", "Maryland": "MD",
-        "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS",
-        "Missouri": "MO", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH",
-        "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY", "North Carolina": "NC",
-        "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA",
-        "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD", "Tennessee": "TN",
-        "Texas": "TX", "Utah": "UT", "Vermont": "VT", "Virginia": "VA", "Washington": "WA",
-        "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY", "District of Columbia": "DC",
-    }
-    df["State Abbrev"] = df["State"].map(state_to_abbrev)
+    df["State Abbrev"] = df["State"].map(STATE_TO_ABBREV)
     return df
 
-# Step 2: Clean county names and merge with FIPS
-def merge_with_fips(df, fips_path = 'https://raw.githubusercontent.com/advanced-computing/chicken_egg/main/app_data/prep_data/state_and_county_fips_master.csv'):
-    fips_data = pd.read_csv(fips_path)
-    fips_data["name"] = fips_data["name"].str.replace(r" County| Borough| Parish", "", regex=True).str.strip()
-    fips_data["fips"] = fips_data["fips"].astype(str)
-
-    df_merged = pd.merge(
-        df,
-        fips_data,
-        left_on=["County", "State Abbrev"],
-        right_on=["name", "state"],
-        how="left"
-    )
-    return df_merged.drop(columns=["name", "state"])
-
-# Step 3: Merge latitude/longitude based on FIPS
-def merge_with_geolocation(df, geolocator_path = 'https://raw.githubusercontent.com/advanced-computing/chicken_egg/main/app_data/prep_data/cfips_location.csv'):
-    geodata = pd.read_csv(geolocator_path)
-    geodata["cfips"] = geodata["cfips"].astype(str)
-    df_geo = pd.merge(df, geodata, left_on="fips", right_on="cfips", how="left")
-    return df_geo.drop(columns=["cfips", "name"])
+# Step 2: Look up county FIPS codes
+def merge_with_fips(df):
+    fips = lookup_fips(df["County"], df["State Abbrev"])
+    df["fips"] = pd.Series(fips, index=df.index).where(fips >= 0).astype("Int64").astype("string")
+    return df
+
+# Step 3: Look up latitude/longitude based on FIPS
+def merge_with_geolocation(df):
+    df["lng"], df["lat"] = lookup_centroids(df["fips"])[::-1]
+    return df
 
 # Isolating logic to check for geospatial columns
 def has_geospatial_columns(df):
     return all(col in df.columns for col in ["fips", "lat", "lng"])
 
-# Removes redundant prep from dataframes used for maps 
+# Adds State Abbrev, fips, lng and lat with array lookups
+def enrich_with_geodata(df):
+    df = add_state_abbreviations(df.copy())
+    if "County" in df.columns:
+        df = merge_with_fips(df)
+    return merge_with_geolocation(df)
+
+# Removes redundant prep from dataframes used for maps
 def ensure_geospatial(df, source_name="data"):
     if has_geospatial_columns(df):
         print(f"Using provided geospatial data for {source_name}")
         return df
     else:
         print(f"Enriching {source_name} with fips/lat/lng")
-        df = add_state_abbreviations(df)
-        
-        if "County" in df.columns:
-            df = merge_with_fips(df)
-
-        df = merge_with_geolocation(df)
-        return df
+        return enrich_with_geodata(df)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds, so a slow endpoint fails its own stage instead of hanging the ETL
+DEFAULT_TIMEOUT = (5, 30)
+
+# Retries with exponential backoff on connection errors and these statuses
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Keep-alive connections kept per host, and downloads allowed at once
+POOL_SIZE = 8
+MAX_CONCURRENT_FETCHES = 4
+
+DOWNLOAD_CHUNK_BYTES = 1 << 16
+
+# Bodies and validators (ETag/Last-Modified) of conditionally fetched urls
+HTTP_CACHE_DIR = "app_data/http_cache"
+
+_session = None
+_session_lock = threading.Lock()
+_fetch_slots = threading.BoundedSemaphore(MAX_CONCURRENT_FETCHES)
+
+
+def get_session():
+    """
+    Returns the process-wide requests session, so repeated requests to a
+    host (e.g. the three Nasdaq tickers) reuse pooled connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                # Hand back the last response, so raise_for_status raises HTTPError instead of RetryError
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def fetch(url, headers=None, params=None, timeout=DEFAULT_TIMEOUT):
+    """
+    GETs a url through the shared session and returns the response with its body read.
+    Raises requests.HTTPError for error statuses left after retries.
+    """
+    with _fetch_slots:
+        response = get_session().get(url, headers=headers, params=params, timeout=timeout)
+        response.raise_for_status()
+    return response
+
+
+def fetch_text(url, **kwargs):
+    return fetch(url, **kwargs).text
+
+
+def fetch_json(url, **kwargs):
+    return fetch(url, **kwargs).json()
+
+
+def fetch_csv(url, headers=None, params=None, timeout=DEFAULT_TIMEOUT, **read_csv_kwargs):
+    """
+    Streams a CSV download straight into pandas without holding the whole
+    body in memory first. Extra keyword arguments go to pd.read_csv.
+    """
+    with _fetch_slots:
+        with get_session().get(url, headers=headers, params=params, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True  # undo gzip/deflate while reading
+            return pd.read_csv(response.raw, **read_csv_kwargs)
+
+
+def _stream_to_file(response, path):
+    """
+    Writes a streamed response body to path via a temporary file, so
+    readers never see a partial file. Returns the body's sha256.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+            digest.update(chunk)
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    return digest.hexdigest()
+
+
+def download_file(url, path, headers=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Streams a download to path.
+    """
+    with _fetch_slots:
+        with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            _stream_to_file(response, path)
+    return path
+
+
+# === CONDITIONAL GET CACHE ===
+def _cache_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(cache_dir, f"{key}.body"), os.path.join(cache_dir, f"{key}.json")
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(data, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def fetch_cached(url, headers=None, timeout=DEFAULT_TIMEOUT, cache_dir=None):
+    """
+    Downloads url into the on-disk HTTP cache with a conditional GET, sending
+    the ETag/Last-Modified saved by the previous download.
+    Returns (path of the cached body, changed). changed is False when the
+    server answers 304 Not Modified, or sends a body identical to the cached one.
+    """
+    cache_dir = cache_dir or HTTP_CACHE_DIR
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    meta = _read_json(meta_path) if os.path.exists(body_path) else {}
+
+    request_headers = dict(headers or {})
+    if meta.get("etag"):
+        request_headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    with _fetch_slots:
+        with get_session().get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code == 304:
+                print(f"Not modified since last download: {url}")
+                return body_path, False
+            content_hash = _stream_to_file(response, body_path)
+            validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    _write_json({"url": url, "sha256": content_hash, **validators}, meta_path)
+    changed = content_hash != meta.get("sha256")
+    if not changed:
+        print(f"Downloaded body is unchanged: {url}")
+    return body_path, changed
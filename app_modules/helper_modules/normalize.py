@@ -0,0 +1,83 @@
+import pandas as pd
+
+# Date layouts of the raw sources, parsed with a fixed format instead of
+# per-column inference. Values that do not match fall back to inference.
+ISO_DATE = "ISO8601"
+CDC_DATE = "%m-%d-%Y"
+US_DATE = "%m/%d/%Y"
+
+
+def pad_fips(values):
+    """
+    Returns 5-digit FIPS strings for ints, floats ("6007.0") or strings
+    ("06007"), with <NA> for anything that is not a valid county code.
+    """
+    return _per_unique(values, _pad_fips_unique)
+
+
+def _pad_fips_unique(values):
+    codes = pd.to_numeric(values, errors="coerce")
+    valid = codes.between(1, 99999) & (codes % 1 == 0)
+    return codes.where(valid).astype("Int64").astype("string").str.zfill(5)
+
+
+def _per_unique(values, func):
+    """
+    Applies a Series -> Series string function once per distinct value and
+    maps the results back, so repeated codes and names cost one array take.
+    """
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return pd.Series(pd.NA, index=values.index, dtype="string")
+    converted = func(pd.Series(uniques, dtype=object)).astype("string").to_numpy()
+    return pd.Series(converted[codes], index=values.index, dtype="string").where(codes >= 0)
+
+
+def strip_currency(values):
+    """
+    Returns floats for values like "$1,234.50", leaving numeric columns as they are.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    cleaned = values.astype("string").str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+    return pd.to_numeric(cleaned.str.strip(), errors="coerce").astype(float)
+
+
+def to_dates(values, format=ISO_DATE):
+    """
+    Parses dates with a known format, inferring it only for the values that
+    do not match (e.g. if a source changes its layout). Unparseable values become NaT.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    dates = pd.to_datetime(values, format=format, errors="coerce")
+    retry = dates.isna() & values.notna()
+    if format is not None and retry.any():
+        dates[retry] = pd.to_datetime(values[retry], format="mixed", errors="coerce")
+    return dates
+
+
+def title_case(values):
+    """
+    Title-cases strings, doing the work once per distinct value.
+    """
+    return _per_unique(values, lambda uniques: uniques.astype("string").str.strip().str.title())
+
+
+def normalize_columns(df, fips=(), currency=(), dates=(), date_format=ISO_DATE, title=()):
+    """
+    Applies the normalizers above to the named columns that exist in df
+    and returns a new frame.
+    """
+    df = df.copy()
+    for steps, func in ((fips, pad_fips), (currency, strip_currency), (title, title_case)):
+        for col in steps:
+            if col in df.columns:
+                df[col] = func(df[col])
+    for col in dates:
+        if col in df.columns:
+            df[col] = to_dates(df[col], format=date_format)
+    return df
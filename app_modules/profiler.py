@@ -0,0 +1,207 @@
+# app_modules/profiler.py
+
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+import plotly.graph_objects as go
+import streamlit as st
+
+# Profiling is on for a rerun when the page is opened with ?profile=1 or
+# this env var is 1. Each profiled rerun is drawn in the sidebar, and also
+# written as a Chrome trace (chrome://tracing, Perfetto) when CHICKEN_EGG_TRACE_DIR is set.
+PROFILE_ENV = "CHICKEN_EGG_PROFILE"
+TRACE_DIR_ENV = "CHICKEN_EGG_TRACE_DIR"
+
+# Each Streamlit session reruns its script on its own thread
+_local = threading.local()
+
+
+def profiling_enabled():
+    return os.getenv(PROFILE_ENV) == "1" or st.query_params.get("profile") == "1"
+
+
+def _active():
+    return getattr(_local, "spans", None) is not None
+
+
+def start_rerun(name="rerun"):
+    """
+    Starts collecting spans for this rerun, with one root span named name.
+    """
+    _local.origin = time.perf_counter()
+    _local.spans = []
+    _local.stack = []
+    _local.root = _open(name, "rerun", {})
+
+
+def finish_rerun():
+    """
+    Stops collecting and returns this rerun's spans, each
+    {"name", "category", "start", "seconds", "depth", "args"} in start order.
+    Returns [] when no rerun is being profiled.
+    """
+    if not _active():
+        return []
+    _close(_local.root)
+    spans = _local.spans
+    _local.spans = None
+    return spans
+
+
+def _open(name, category, args):
+    entry = {
+        "name": name,
+        "category": category,
+        "start": time.perf_counter() - _local.origin,
+        "seconds": None,
+        "depth": len(_local.stack),
+        "args": args,
+    }
+    _local.spans.append(entry)
+    _local.stack.append(entry)
+    return entry
+
+
+def _close(entry):
+    entry["seconds"] = time.perf_counter() - _local.origin - entry["start"]
+    _local.stack.pop()
+
+
+@contextlib.contextmanager
+def span(name, category="app", **args):
+    """
+    Times the enclosed block as a child of the innermost open span.
+    Yields the span's args dict (None when not profiling) so callers can attach values.
+    """
+    if not _active():
+        yield None
+        return
+    entry = _open(name, category, args)
+    try:
+        yield entry["args"]
+    finally:
+        _close(entry)
+
+
+def profiled(category):
+    """
+    Decorator recording each call of a function as a span named after it.
+    Put it above st.cache_data so cache hits are timed too.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active():
+                return func(*args, **kwargs)
+            with span(func.__name__, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def plotly_chart(fig, **kwargs):
+    """
+    st.plotly_chart with a span for its serialization and send. While
+    profiling, the figure's JSON payload size is recorded on the span.
+    """
+    kwargs.setdefault("use_container_width", True)
+    with span("st.plotly_chart", "render") as args:
+        st.plotly_chart(fig, **kwargs)
+    if args is not None:
+        # Measured outside the span, so the extra serialization only shows in the parent
+        args["payload_bytes"] = len(fig.to_json().encode("utf-8"))
+        args["traces"] = len(fig.data)
+
+
+# === OUTPUT ===
+def chrome_trace(spans):
+    """
+    Returns spans as Chrome trace event JSON (complete "X" events in microseconds).
+    """
+    return {
+        "traceEvents": [
+            {
+                "name": s["name"],
+                "cat": s["category"],
+                "ph": "X",
+                "ts": round(s["start"] * 1e6),
+                "dur": round(s["seconds"] * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": s["args"],
+            }
+            for s in spans
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def write_trace(spans, trace_dir=None):
+    """
+    Writes a rerun's spans to trace_dir (default CHICKEN_EGG_TRACE_DIR) and returns the path.
+    """
+    trace_dir = trace_dir or os.getenv(TRACE_DIR_ENV)
+    os.makedirs(trace_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(trace_dir, f"rerun-{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(spans), f, default=str)
+    return path
+
+
+def flame_figure(spans):
+    """
+    Builds a flame-style chart: one bar per span, placed at its start time,
+    with nested spans stacked below their parent.
+    """
+    fig = go.Figure(go.Bar(
+        base=[s["start"] * 1000 for s in spans],
+        x=[s["seconds"] * 1000 for s in spans],
+        y=[s["depth"] for s in spans],
+        orientation="h",
+        text=[s["name"] for s in spans],
+        textposition="inside",
+        insidetextanchor="start",
+        hovertext=[
+            f"{s['name']}: {s['seconds'] * 1000:.1f} ms"
+            + (f", {s['args']['payload_bytes'] / 1024:.0f} KB" if "payload_bytes" in s["args"] else "")
+            for s in spans
+        ],
+        hoverinfo="text",
+        marker_color=[s["depth"] for s in spans],
+        marker_colorscale="YlOrRd",
+    ))
+    fig.update_layout(
+        height=60 + 28 * (max(s["depth"] for s in spans) + 1),
+        margin={"l": 0, "r": 0, "t": 10, "b": 30},
+        xaxis_title="ms",
+        yaxis={"autorange": "reversed", "visible": False},
+        bargap=0.05,
+    )
+    return fig
+
+
+def show_profile(spans):
+    """
+    Sidebar breakdown of a profiled rerun: a flame chart and a table of
+    spans with their times and figure payloads.
+    """
+    if not spans:
+        return
+    with st.sidebar.expander(f"⏱️ Rerun profile: {spans[0]['seconds'] * 1000:.0f} ms", expanded=True):
+        st.plotly_chart(flame_figure(spans), use_container_width=True)
+        st.dataframe(
+            [
+                {
+                    "span": "  " * s["depth"] + s["name"],
+                    "ms": round(s["seconds"] * 1000, 1),
+                    "payload KB": round(s["args"]["payload_bytes"] / 1024, 1) if "payload_bytes" in s["args"] else None,
+                }
+                for s in spans
+            ],
+            hide_index=True,
+        )
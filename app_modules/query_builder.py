@@ -0,0 +1,136 @@
+# app_modules/query_builder.py
+
+# Aggregate name -> SQL function. "avg" casts its column to a float first,
+# since lat/lng are stored as STRING in BigQuery.
+AGGREGATES = {"sum": "SUM", "avg": "AVG", "count": "COUNT", "min": "MIN", "max": "MAX"}
+
+DIALECTS = {
+    "bigquery": {
+        "quote": "`{}`",
+        "month": "DATE_TRUNC(DATE({}), MONTH)",
+        "float": "SAFE_CAST({} AS FLOAT64)",
+        "param": "@{}",
+        "in_list": "{} IN UNNEST({})",
+    },
+    "duckdb": {
+        "quote": '"{}"',
+        "month": "CAST(date_trunc('month', {}) AS DATE)",
+        "float": "TRY_CAST({} AS DOUBLE)",
+        "param": "${}",
+        "in_list": "list_contains({1}, {0})",
+    },
+}
+
+# Alias given to the truncated month column
+MONTH_COLUMN = "Month"
+
+# Column that date_from/date_to filter on, per table
+DATE_COLUMNS = {
+    "bird_flu": "Outbreak Date",
+    "wild_birds": "Date Detected",
+    "egg_prices": "Date",
+    "calmaine": "Date",
+    "vitl": "Date",
+    "post": "Date",
+}
+
+# Stock prices live in one table per ticker
+STOCK_TABLES = {"CALM": "calmaine", "VITL": "vitl", "POST": "post"}
+
+
+def query_columns(columns=None, group_by=None, aggregates=None, month=None,
+                  date_column=None, date_from=None, date_to=None, states=None):
+    """
+    Returns the table columns a query reads, or None when it reads all of them.
+    """
+    if columns is None and group_by is None and aggregates is None:
+        return None
+
+    needed = list(columns or [])
+    needed += [col for col in (group_by or []) if col != MONTH_COLUMN]
+    needed += [col for _, col in (aggregates or {}).values() if col != "*"]
+    if month is not None:
+        needed.append(month)
+    if date_from is not None or date_to is not None:
+        needed.append(date_column)
+    if states is not None:
+        needed.append("State")
+    return list(dict.fromkeys(needed))
+
+
+def compile_filters(dialect, date_column=None, date_from=None, date_to=None, states=None):
+    """
+    Returns (where clause, params) for a date window and a state list.
+    Values are passed as query parameters, never formatted into the SQL.
+    """
+    syntax = DIALECTS[dialect]
+    quote = syntax["quote"].format
+    param = syntax["param"].format
+
+    conditions, params = [], {}
+    if (date_from is not None or date_to is not None) and date_column is None:
+        raise ValueError("date_from/date_to need a date_column")
+    if date_from is not None:
+        conditions.append(f"{quote(date_column)} >= {param('date_from')}")
+        params["date_from"] = date_from
+    if date_to is not None:
+        conditions.append(f"{quote(date_column)} <= {param('date_to')}")
+        params["date_to"] = date_to
+    if states is not None:
+        conditions.append(syntax["in_list"].format(quote("State"), param("states")))
+        params["states"] = list(states)
+
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+
+def compile_query(relation, dialect, columns=None, group_by=None, aggregates=None, month=None,
+                  date_column=None, date_from=None, date_to=None, states=None):
+    """
+    Compiles a declarative query into parameterised SQL for BigQuery or DuckDB.
+
+    columns: plain columns to select (all of them if nothing else is given)
+    group_by: grouping keys, which may include "Month"
+    aggregates: {alias: (aggregate, column)}, e.g. {"Wild Count": ("count", "*")}
+    month: date column truncated to the first of its month and returned as "Month"
+    date_from/date_to: inclusive window on date_column
+    states: only rows whose State is in this list
+
+    Returns (sql, params).
+    """
+    if dialect not in DIALECTS:
+        raise ValueError(f"Unknown SQL dialect '{dialect}'")
+    if columns is not None and (group_by or aggregates):
+        raise ValueError("Pass either columns or group_by/aggregates, not both")
+
+    syntax = DIALECTS[dialect]
+    quote = syntax["quote"].format
+
+    def column_sql(col):
+        if col == MONTH_COLUMN and month is not None:
+            return syntax["month"].format(quote(month))
+        return quote(col)
+
+    select = []
+    if group_by or aggregates:
+        select += [f"{column_sql(col)} AS {quote(col)}" for col in (group_by or [])]
+        for alias, (func, col) in (aggregates or {}).items():
+            if func not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate '{func}'. Use one of {list(AGGREGATES)}")
+            arg = "*" if col == "*" else quote(col)
+            if func == "avg":
+                arg = syntax["float"].format(arg)
+            select.append(f"{AGGREGATES[func]}({arg}) AS {quote(alias)}")
+    elif columns is None:
+        select.append("*")
+    else:
+        select += [quote(col) for col in columns]
+
+    if month is not None and not (group_by or aggregates):
+        select.append(f"{column_sql(MONTH_COLUMN)} AS {quote(MONTH_COLUMN)}")
+
+    where, params = compile_filters(dialect, date_column, date_from, date_to, states)
+    sql = f"SELECT {', '.join(select)} FROM {relation}{where}"
+    if group_by:
+        sql += " GROUP BY " + ", ".join(str(i) for i in range(1, len(group_by) + 1))
+    return sql, params
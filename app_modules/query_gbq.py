@@ -1,40 +1,428 @@
-
-
+import collections
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
 from google.cloud import bigquery
 import pandas as pd
 import streamlit as st
 from google.oauth2 import service_account
+from . import shared_cache
+from .data_sources import (
+    get_data_source,
+    local_table_versions,
+    memory_table_versions,
+    query_duckdb,
+    query_memory,
+)
+from .query_builder import DATE_COLUMNS, STOCK_TABLES, compile_query, query_columns
+
+# How often the schema catalog asks BigQuery whether any table has changed
+SCHEMA_CHECK_SECONDS = 300
+
+# Cached query and prep results are keyed on a data version instead of a
+# TTL. The BigQuery version (every table's last modified time, one metadata
+# query) is re-read at most this often per process.
+VERSION_CHECK_SECONDS = 60
+
+# Results kept per cached function; entries for old data versions are the first to go
+CACHE_MAX_ENTRIES = 256
+
+# Optional cap on the bytes a single BigQuery query may scan, checked with a
+# dry run before the query runs. Unset means no limit.
+QUERY_BYTE_BUDGET_ENV = "CHICKEN_EGG_QUERY_BYTE_BUDGET"
+
+# Query stats are kept for the diagnostics panel. Set this to a file path to
+# also append them there as JSON lines, or to "stdout" to print them
+QUERY_LOG_ENV = "CHICKEN_EGG_QUERY_LOG"
+QUERY_STATS_KEPT = 500
+
+_catalogs = {}
+_catalog_lock = threading.Lock()
+
+_versions = {}
+_version_lock = threading.Lock()
+
+_query_stats = collections.deque(maxlen=QUERY_STATS_KEPT)
+_stats_lock = threading.Lock()
+_cache_runs = threading.local()
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A query's dry-run estimate is above the configured byte budget."""
+
+
+@st.cache_resource
+def get_client():
+    """
+    Builds the BigQuery client on first use and shares it across sessions.
+    Credentials are only needed by the bigquery data source.
+    """
+    creds = st.secrets["gcp_service_account"]
+    credentials = service_account.Credentials.from_service_account_info(creds)
+    return bigquery.Client(credentials=credentials, project=credentials.project_id)
+
+
+# === SCHEMA CATALOG ===
+def table_modified_times(project_id="sipa-adv-c-arnav-fred"):
+    """
+    Returns {table: last modified time in ms} for every chicken_egg table in one metadata query.
+    """
+    query = f"SELECT table_id, last_modified_time FROM `{project_id}.chicken_egg.__TABLES__`"
+    df = get_client().query(query).to_dataframe(create_bqstorage_client=False)
+    return dict(zip(df["table_id"], df["last_modified_time"].astype(int)))
+
+
+def _load_catalog(project_id):
+    # Columns and modified times of every table in a single query
+    query = f"""
+        SELECT c.table_name, c.column_name, t.last_modified_time
+        FROM `{project_id}.chicken_egg.INFORMATION_SCHEMA.COLUMNS` AS c
+        JOIN `{project_id}.chicken_egg.__TABLES__` AS t ON t.table_id = c.table_name
+        ORDER BY c.table_name, c.ordinal_position
+    """
+    df = get_client().query(query).to_dataframe(create_bqstorage_client=False)
+    print(f"Loaded schema catalog for {df['table_name'].nunique()} tables.")
+    return {
+        "checked_at": time.monotonic(),
+        "modified": dict(zip(df["table_name"], df["last_modified_time"].astype(int))),
+        "columns": df.groupby("table_name", sort=False)["column_name"].apply(list).to_dict(),
+    }
+
+
+# === DATA VERSIONS ===
+def table_versions(source=None, project_id="sipa-adv-c-arnav-fred", refresh=False):
+    """
+    Returns {table: version} for a data source. BigQuery versions are the
+    tables' last modified times, fetched for all tables in one metadata query
+    shared by every session and refreshed at most every VERSION_CHECK_SECONDS
+    (or now with refresh=True). Local versions are file modified times.
+    If the BigQuery check fails, the last known versions are kept, so cached
+    results are still served.
+    """
+    source = get_data_source(source)
+    if source == "duckdb":
+        return local_table_versions()
+    if source == "memory":
+        return memory_table_versions()
+
+    # One session refreshes while the others keep using the previous versions
+    with _version_lock:
+        entry = _versions.get(project_id)
+        due = entry is None or refresh or (
+            not entry["refreshing"] and time.monotonic() - entry["checked_at"] > VERSION_CHECK_SECONDS)
+        if not due:
+            return entry["modified"]
+        if entry is not None:
+            entry["refreshing"] = True
+
+    try:
+        modified = table_modified_times(project_id)
+    except Exception as e:
+        print(f"Could not check table versions in {project_id}, keeping the last known ones: {e!r}")
+        with _version_lock:
+            if entry is None:
+                return {}
+            # Retried after another interval rather than on every call
+            entry.update(checked_at=time.monotonic(), refreshing=False)
+            return entry["modified"]
+
+    with _version_lock:
+        _versions[project_id] = {"checked_at": time.monotonic(), "modified": modified, "refreshing": False}
+    return modified
+
+
+def data_version(tables=None, source=None, project_id="sipa-adv-c-arnav-fred"):
+    """
+    Returns a short key that changes whenever any of tables (default: all) is reloaded.
+    """
+    versions = table_versions(source, project_id)
+    names = sorted(versions) if tables is None else tables
+    key = repr([(get_data_source(source), name, versions.get(name)) for name in names])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_by_data_version(func=None, *, tables=None):
+    """
+    Caches a function with st.cache_data until the data changes, rather
+    than for a fixed time: the current data_version() is passed to the
+    cached function as an extra argument, so a new load misses the cache
+    while unchanged data is never recomputed. Misses then go to the shared
+    cache, when one is configured (see shared_cache.py).
+
+    tables lists what the function reads, so loads of other tables keep its
+    entries. Each entry is a table name, or the name of a parameter holding
+    a table name or a list of them (e.g. "table_name"), read from each call.
+    Without tables, a load of any table invalidates the cache.
+        @cache_by_data_version(tables=["bird_flu_table", "wild_bird_table"])
+    """
+    if func is None:
+        return functools.partial(cache_by_data_version, tables=tables)
+
+    signature = inspect.signature(func)
+
+    def read_tables(args, kwargs):
+        if tables is None:
+            return None
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        names = set()
+        for entry in tables:
+            value = bound.arguments.get(entry, entry)
+            names.update([value] if isinstance(value, str) else value)
+        return sorted(names)
 
+    def versioned(data_version, *args, **kwargs):
+        store = shared_cache.get_store()
+        # Memory table versions only mean something inside this process
+        if store is None or get_data_source() == "memory":
+            return func(*args, **kwargs)
+        return shared_cache.cached_call(store, func, data_version, args, kwargs)
 
-creds = st.secrets["gcp_service_account"]
-credentials = service_account.Credentials.from_service_account_info(creds)
+    # st.cache_data keys entries on the function's name, so each wrapped function gets its own cache
+    versioned.__module__ = func.__module__
+    versioned.__name__ = func.__name__
+    versioned.__qualname__ = func.__qualname__
+    cached = st.cache_data(max_entries=CACHE_MAX_ENTRIES)(versioned)
 
-# Initializing bigquery
-client = bigquery.Client(credentials=credentials, project=credentials.project_id)
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return cached(data_version(read_tables(args, kwargs)), *args, **kwargs)
 
+    wrapper.clear = cached.clear
+    return wrapper
 
-@st.cache_data(ttl=3600)
-def query_table(table_name: str, columns: str = "*", project_id="sipa-adv-c-arnav-fred") -> pd.DataFrame:
-    
 
-    # Fetch all schema fields from BigQuery if columns is None
-    if columns is None:
-        table_ref = f"{project_id}.chicken_egg.{table_name}"
-        table = client.get_table(table_ref)
-        columns = [field.name for field in table.schema]
+def get_table_columns(table_name, project_id="sipa-adv-c-arnav-fred", refresh=False):
+    """
+    Returns the column names of a chicken_egg table from the cached catalog.
+    The catalog is reloaded only when a table's modified time has changed,
+    which is checked at most every SCHEMA_CHECK_SECONDS unless refresh=True.
+    """
+    with _catalog_lock:
+        catalog = _catalogs.get(project_id)
+        if catalog is None:
+            catalog = _load_catalog(project_id)
+        elif refresh or time.monotonic() - catalog["checked_at"] > SCHEMA_CHECK_SECONDS:
+            if table_versions("bigquery", project_id, refresh=True) != catalog["modified"]:
+                catalog = _load_catalog(project_id)
+            else:
+                catalog["checked_at"] = time.monotonic()
+        _catalogs[project_id] = catalog
 
-    # Safety check: ensure all requested columns exist in the table
-    else:
-        table_ref = f"{project_id}.chicken_egg.{table_name}"
-        table = client.get_table(table_ref)
-        all_columns = [field.name for field in table.schema]
-        missing = [col for col in columns if col not in all_columns]
+    if table_name not in catalog["columns"]:
+        if not refresh:
+            return get_table_columns(table_name, project_id, refresh=True)
+        raise ValueError(f"Table {table_name} not found in {project_id}.chicken_egg")
+    return catalog["columns"][table_name]
+
+
+def _bigquery_params(params):
+    # Typed query parameters for the filters compiled by query_builder
+    query_parameters = []
+    for name, value in params.items():
+        if isinstance(value, list):
+            query_parameters.append(bigquery.ArrayQueryParameter(name, "STRING", value))
+        elif isinstance(value, datetime.date):
+            query_parameters.append(bigquery.ScalarQueryParameter(name, "DATE", value))
+        else:
+            query_parameters.append(bigquery.ScalarQueryParameter(name, "STRING", value))
+    return query_parameters
+
+
+def query_byte_budget():
+    budget = os.getenv(QUERY_BYTE_BUDGET_ENV)
+    return int(budget) if budget else None
+
+
+def _check_budget(sql, query_parameters, budget):
+    """
+    Dry-runs a query and raises QueryBudgetExceeded if it would scan more than budget bytes.
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters, dry_run=True, use_query_cache=False)
+    estimate = get_client().query(sql, job_config=job_config).total_bytes_processed or 0
+    if estimate > budget:
+        raise QueryBudgetExceeded(
+            f"Query would scan {estimate:,} bytes, over the {budget:,} byte budget ({QUERY_BYTE_BUDGET_ENV})")
+    return estimate
+
+
+def query_bigquery(table_name: str, project_id="sipa-adv-c-arnav-fred", stats=None, **query) -> pd.DataFrame:
+    """
+    Runs a query (see query_builder.compile_query) against a chicken_egg table in BigQuery.
+    With a byte budget set, the query is dry-run first and refused if it is over budget.
+    Bytes processed and billed are added to stats when a dict is passed.
+    """
+    needed = query_columns(**query)
+
+    # Safety check: ensure all requested columns exist in the table,
+    # re-checking BigQuery once in case the schema just changed
+    if needed is not None:
+        all_columns = get_table_columns(table_name, project_id)
+        missing = [col for col in needed if col not in all_columns]
+        if missing:
+            all_columns = get_table_columns(table_name, project_id, refresh=True)
+            missing = [col for col in needed if col not in all_columns]
         if missing:
             raise ValueError(f"Columns not found in table {table_name}: {missing}")
-    
-    select_clause = ", ".join([f"`{col}`" for col in columns])
-    query = f"SELECT {select_clause} FROM `sipa-adv-c-arnav-fred.chicken_egg.{table_name}`"
-    return client.query(query).to_dataframe(create_bqstorage_client=False)
+
+    sql, params = compile_query(f"`{project_id}.chicken_egg.{table_name}`", "bigquery", **query)
+    query_parameters = _bigquery_params(params)
+    budget = query_byte_budget()
+    if budget is not None:
+        _check_budget(sql, query_parameters, budget)
+
+    job = get_client().query(sql, job_config=bigquery.QueryJobConfig(query_parameters=query_parameters))
+    df = job.to_dataframe(create_bqstorage_client=False)
+    if stats is not None:
+        stats.update({
+            "bytes_processed": job.total_bytes_processed,
+            "bytes_billed": job.total_bytes_billed,
+            "bigquery_cache_hit": job.cache_hit,
+        })
+    return df
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def _query_cached(table_name, project_id, source, query, version):
+    # version (the table's data version) is only part of the cache key
+    # Only runs on a cache miss, which query_table detects through this flag
+    _cache_runs.ran = True
+    stats = {}
+    if source == "duckdb":
+        return query_duckdb(table_name, **query), stats
+    return query_bigquery(table_name, project_id, stats=stats, **query), stats
+
+
+# === QUERY STATS ===
+def _calling_function():
+    """
+    Returns the prep_* function that issued the query, or the direct caller of query_table.
+    """
+    frame = sys._getframe(2)
+    caller = frame.f_code.co_name
+    while frame is not None:
+        if frame.f_code.co_name.startswith("prep_"):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return caller
+
+
+def _record_query(stats):
+    with _stats_lock:
+        _query_stats.append(stats)
+    log_path = os.getenv(QUERY_LOG_ENV)
+    if not log_path:
+        return
+    # Runs after every query, so a failing log must not replace its result or error
+    try:
+        line = json.dumps(stats, default=str)
+        if log_path == "stdout":
+            print(f"query_stats {line}")
+        else:
+            with _stats_lock, open(log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except Exception as e:
+        print(f"Could not write query stats to {log_path}: {e!r}")
+
+
+def recent_query_stats():
+    """
+    Returns the stats of the most recent queries in this process, from
+    every session, oldest first:
+    {"at", "table", "source", "caller", "seconds", "rows", "bytes_processed",
+    "bytes_billed", "cache_hit", "bigquery_cache_hit", "error"}.
+    Bytes are None where the source does not report them, and 0 on cache hits.
+    """
+    with _stats_lock:
+        return list(_query_stats)
+
+
+def clear_query_stats():
+    with _stats_lock:
+        _query_stats.clear()
+
+
+def _as_date(value):
+    return None if value is None else pd.Timestamp(value).date()
+
+
+def query_table(table_name: str = None, columns=None, project_id="sipa-adv-c-arnav-fred", source=None,
+                group_by=None, aggregates=None, month=None,
+                date_from=None, date_to=None, states=None, ticker=None, date_column=None) -> pd.DataFrame:
+    """
+    Queries a chicken_egg table from the configured data source: BigQuery,
+    the local DuckDB/Parquet store, or tables registered in memory.
+
+    With only columns (or nothing) it returns raw rows. With group_by and
+    aggregates the rollup runs inside the SQL engine, e.g.
+        query_table("wild_birds", group_by=["Month", "State"],
+                    aggregates={"Wild Count": ("count", "*")}, month="Date Detected")
+
+    date_from/date_to (inclusive) and states filter rows before they leave the
+    engine; ticker picks the stock table (e.g. "CALM" -> calmaine). The date
+    column comes from query_builder.DATE_COLUMNS unless date_column is given.
+    Each filter combination is cached until the table is reloaded (see
+    data_version), and every call is recorded (see recent_query_stats).
+    """
+    source = get_data_source(source)
+    if ticker is not None:
+        if ticker.upper() not in STOCK_TABLES:
+            raise ValueError(f"Unknown ticker '{ticker}'. Use one of {list(STOCK_TABLES)}")
+        table_name = STOCK_TABLES[ticker.upper()]
+    if table_name is None:
+        raise ValueError("Pass a table_name or a ticker")
+
+    query = {
+        "columns": None if columns is None else list(columns),
+        "group_by": None if group_by is None else list(group_by),
+        "aggregates": None if aggregates is None else {k: tuple(v) for k, v in aggregates.items()},
+        "month": month,
+        "date_column": date_column or DATE_COLUMNS.get(table_name),
+        "date_from": _as_date(date_from),
+        "date_to": _as_date(date_to),
+        "states": None if states is None else sorted(states),
+    }
+
+    stats = {
+        "at": datetime.datetime.now(datetime.UTC).isoformat(timespec="milliseconds"),
+        "table": table_name,
+        "source": source,
+        "caller": _calling_function(),
+        "rows": None,
+        "bytes_processed": None,
+        "bytes_billed": None,
+        "cache_hit": False,
+        "bigquery_cache_hit": None,
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        # In-memory tables are already local, so they skip the cache
+        if source == "memory":
+            df = query_memory(table_name, **query)
+        else:
+            _cache_runs.ran = False
+            version = data_version([table_name], source, project_id)
+            df, job_stats = _query_cached(table_name, project_id, source, query, version)
+            stats["cache_hit"] = not _cache_runs.ran
+            if stats["cache_hit"]:
+                # Served from the Streamlit cache, so nothing was scanned this time
+                job_stats = {name: 0 for name in ("bytes_processed", "bytes_billed") if name in job_stats}
+            stats.update(job_stats)
+        stats["rows"] = len(df)
+        return df
+    except Exception as e:
+        stats["error"] = repr(e)
+        raise
+    finally:
+        stats["seconds"] = round(time.perf_counter() - start, 4)
+        _record_query(stats)
 
 
 def main():
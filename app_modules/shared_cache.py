@@ -0,0 +1,325 @@
+# app_modules/shared_cache.py
+
+import contextlib
+import datetime
+import functools
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from .helper_modules.http_fetch import DEFAULT_TIMEOUT, get_session
+from .profiler import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process compute lock
+    fcntl = None
+
+# A second cache tier behind st.cache_data, shared by every worker process
+# and kept across restarts. Off when unset; "disk" keeps results under
+# CHICKEN_EGG_SHARED_CACHE_DIR, and an http(s) url GETs and PUTs them there
+# (any store answering GET/PUT/404 per key, e.g. a bucket or WebDAV share).
+SHARED_CACHE_ENV = "CHICKEN_EGG_SHARED_CACHE"
+SHARED_CACHE_DIR_ENV = "CHICKEN_EGG_SHARED_CACHE_DIR"
+SHARED_CACHE_DIR = "app_data/result_cache"
+
+# Bump when the payload format changes, so old entries are never read
+FORMAT_VERSION = 1
+
+# Every key includes a hash of these sources, so a release that changes any
+# prep code or helper (constants, compact_frame, the cube code) starts afresh
+RELEASE_SOURCES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# How long a worker waits for another one computing the same result before computing it too
+LOCK_WAIT_SECONDS = 300
+LOCK_POLL_SECONDS = 0.1
+
+# Disk entries not written for this long are removed when a process opens the store
+DISK_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+# === SERIALIZATION ===
+class _Pickler(pickle.Pickler):
+    # DataFrames travel as Arrow IPC streams inside the pickle of the result
+    def persistent_id(self, obj):
+        if not isinstance(obj, pd.DataFrame):
+            return None
+        try:
+            table = pa.Table.from_pandas(obj)
+        except (pa.ArrowException, TypeError, ValueError):
+            return None  # mixed object columns: pickled as is
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return ("arrow", sink.getvalue())
+
+
+class _Unpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        kind, data = pid
+        if kind != "arrow":
+            raise pickle.UnpicklingError(f"Unknown shared cache object {kind}")
+        return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def dumps(result):
+    """
+    Serializes a prep result: its DataFrames as Arrow IPC (categoricals and
+    nullable ints restore from the pandas metadata), everything around them pickled.
+    """
+    buffer = io.BytesIO()
+    _Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(result)
+    return buffer.getvalue()
+
+
+def loads(payload):
+    return _Unpickler(io.BytesIO(payload)).load()
+
+
+@functools.cache
+def release_hash(directory=RELEASE_SOURCES_DIR):
+    """
+    Returns a hash of every .py file under directory (app_modules), read once per process.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(f for f in files if f.endswith(".py")):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, directory).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _code_fingerprint(code):
+    # Bytecode plus constants, with nested functions expanded (their repr holds a memory address)
+    consts = tuple(_code_fingerprint(c) if hasattr(c, "co_code") else repr(c) for c in code.co_consts)
+    return (code.co_code.hex(), consts)
+
+
+# Arguments whose repr is their full value
+_PLAIN_TYPES = (str, int, float, bool, type(None), datetime.date, np.generic)
+
+
+def _argument_fingerprint(value):
+    """
+    Returns a stable stand-in for an argument: plain values as themselves,
+    containers element by element, and frames and arrays by a hash of their
+    contents (their repr elides the middle rows). Raises TypeError for
+    anything else, which is then not cached here.
+    """
+    if isinstance(value, _PLAIN_TYPES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_argument_fingerprint(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((repr(k), _argument_fingerprint(v)) for k, v in value.items())))
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        digest = hashlib.sha256(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+        layout = value.dtypes.to_dict() if isinstance(value, pd.DataFrame) else value.dtype
+        return (type(value).__name__, repr(layout), digest.hexdigest())
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return ("ndarray", str(value.dtype), value.shape, hashlib.sha256(value.tobytes()).hexdigest())
+    raise TypeError(f"No stable shared cache key for {type(value).__name__} arguments")
+
+
+def result_key(func, data_version, args, kwargs):
+    """
+    Returns the entry key for one call: the release, the function's code,
+    constants and defaults, the arguments and the data version, so a new
+    load or a new release never reads an old result. Raises TypeError for
+    arguments that cannot be keyed by content.
+    """
+    args = _argument_fingerprint(tuple(args))
+    kwargs = _argument_fingerprint(dict(kwargs))
+    code = repr((_code_fingerprint(func.__code__), func.__defaults__, func.__kwdefaults__))
+    code = hashlib.sha1(code.encode("utf-8")).hexdigest()
+    call = repr((FORMAT_VERSION, release_hash(), func.__module__, func.__qualname__, code,
+                 data_version, args, kwargs))
+    return f"{func.__name__}-{hashlib.sha256(call.encode('utf-8')).hexdigest()[:40]}"
+
+
+# === STORES ===
+@contextlib.contextmanager
+def _file_lock(path, wait=LOCK_WAIT_SECONDS):
+    """
+    Holds an exclusive flock on path, shared by every process on the host.
+    Gives up after wait seconds (the holder is then assumed stuck) and
+    continues unlocked. The OS releases the lock if its holder dies.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        deadline = time.monotonic() + wait
+        locked = False
+        while not locked:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    print(f"Shared cache lock {path} held for over {wait}s; computing anyway.")
+                    break
+                time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            if locked:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class DiskStore:
+    """
+    Results as files in a directory that every worker on the host (or a
+    shared volume) can read. Writes go to a temporary file that is renamed
+    into place, so readers see a whole entry or none.
+    """
+
+    def __init__(self, directory=None, max_age=DISK_MAX_AGE_SECONDS):
+        self.directory = directory or os.getenv(SHARED_CACHE_DIR_ENV) or SHARED_CACHE_DIR
+        self.prune(max_age)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, payload):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    def lock(self, key):
+        return _file_lock(os.path.join(self.directory, "locks", f"{key}.lock"))
+
+    def prune(self, max_age):
+        """
+        Removes entries, stray temporary files and lock files older than max_age seconds.
+        """
+        cutoff = time.time() - max_age
+        for folder in (self.directory, os.path.join(self.directory, "locks")):
+            with contextlib.suppress(FileNotFoundError):
+                for entry in os.scandir(folder):
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        with contextlib.suppress(OSError):
+                            os.remove(entry.path)
+
+
+class HttpStore:
+    """
+    Results on a key/value HTTP endpoint: GET url/key (404 when missing)
+    and PUT url/key. The endpoint is expected to replace a key atomically.
+    Workers on one host coalesce computations with a local lock file.
+    Workers on different hosts each compute once.
+    """
+
+    def __init__(self, url, lock_dir=None):
+        self.url = url.rstrip("/")
+        self.lock_dir = lock_dir or os.path.join(tempfile.gettempdir(), "chicken_egg_result_locks")
+
+    def get(self, key):
+        response = get_session().get(f"{self.url}/{key}", timeout=DEFAULT_TIMEOUT)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    def put(self, key, payload):
+        response = get_session().put(
+            f"{self.url}/{key}",
+            data=payload,
+            headers={"Content-Type": "application/octet-stream"},
+            timeout=DEFAULT_TIMEOUT,
+        )
+        response.raise_for_status()
+
+    def lock(self, key):
+        return _file_lock(os.path.join(self.lock_dir, f"{key}.lock"))
+
+
+def get_store(setting=None):
+    """
+    Returns the process's store for a CHICKEN_EGG_SHARED_CACHE setting, or None when it is off.
+    """
+    setting = setting if setting is not None else os.getenv(SHARED_CACHE_ENV, "")
+    if setting in ("", "off"):
+        return None
+    with _stores_lock:
+        if setting not in _stores:
+            if setting == "disk":
+                _stores[setting] = DiskStore()
+            elif setting.startswith(("http://", "https://")):
+                _stores[setting] = HttpStore(setting)
+            else:
+                raise ValueError(f"{SHARED_CACHE_ENV} must be disk, off or an http(s) url, not {setting!r}")
+        return _stores[setting]
+
+
+# === LOOKUP ===
+def _read(store, key):
+    # A broken or unreachable store only costs a recomputation
+    try:
+        with span("shared_cache.get", "cache") as args:
+            payload = store.get(key)
+            if args is not None:
+                args["bytes"] = len(payload) if payload else 0
+        return None if payload is None else (loads(payload),)
+    except Exception as e:
+        print(f"Shared cache read of {key} failed: {e!r}")
+        return None
+
+
+def _write(store, key, result):
+    try:
+        with span("shared_cache.put", "cache"):
+            store.put(key, dumps(result))
+    except Exception as e:
+        print(f"Shared cache write of {key} failed: {e!r}")
+
+
+def cached_call(store, func, data_version, args=(), kwargs=None):
+    """
+    Returns func(*args, **kwargs) from the store, computing and storing it
+    on a miss. Concurrent misses for the same key wait on the store's lock,
+    so only one of them computes and the rest read its result.
+    """
+    kwargs = kwargs or {}
+    try:
+        key = result_key(func, data_version, args, kwargs)
+    except (TypeError, ValueError):
+        # e.g. a frame with unhashable cells: st.cache_data still covers this process
+        return func(*args, **kwargs)
+    found = _read(store, key)
+    if found:
+        return found[0]
+    with store.lock(key):
+        found = _read(store, key)
+        if found:
+            return found[0]
+        result = func(*args, **kwargs)
+        _write(store, key, result)
+    return result
@@ -1,19 +1,24 @@
 import streamlit as st
+from app_modules.profiler import profiled
 from app_modules.visualizations_app import (
     show_price_comparison,
     show_bird_flu_trends,
     show_combined_dashboard,
     show_wild_bird_map,
     show_flock_county_choropleth,
+    show_outbreak_leaderboard,
 )
 from app_modules.functions_app import (
-    prep_bird_flu_data,
+    prep_county_store,
     prep_egg_price_data,
+    prep_outbreak_totals,
+    prep_state_cube,
     prep_stock_price_data,
     prep_wild_bird_data
 )
 
 # === TAB 1 ===
+@profiled("tab")
 def render_tab1_about_app():
     st.image("app_modules/rooster.jpg", caption="What came first, the chicken or the egg?", use_container_width=True)
 
@@ -77,32 +82,35 @@ def render_tab1_about_app():
 
 
 # === TAB 2 ===
+@profiled("tab")
 def render_tab2_bird_flu():
-    wild_grouped, valid_states = prep_wild_bird_data("wild_birds")
+    _, valid_states = prep_wild_bird_data("wild_birds")
     
-    bird_data_state = prep_bird_flu_data("bird_flu", group_by = 'state')
+    state_cube = prep_state_cube("bird_flu", "wild_birds")
     
-    bird_data_county = prep_bird_flu_data("bird_flu", group_by="county")
+    county_store = prep_county_store("bird_flu")
 
-    total_chicken_deaths = bird_data_state['Flock Size'].sum()
-    total_wild_bird_infections = wild_grouped['Wild Count'].sum()
-    latest_date_str = wild_grouped.sort_values('Month')['Month_str'].iloc[-1]
+    totals = prep_outbreak_totals("bird_flu", "wild_birds")
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("Cumulative Chicken Deaths", f"{total_chicken_deaths:,}")
-    col2.metric("Total Wild Bird Infections", f"{total_wild_bird_infections:,}")
-    col3.metric("Latest Wild Bird Detection", latest_date_str)
+    col1.metric("Cumulative Chicken Deaths", f"{totals['total_chicken_deaths']:,}")
+    col2.metric("Total Wild Bird Infections", f"{totals['total_wild_bird_infections']:,}")
+    col3.metric("Latest Wild Bird Detection", totals["latest_wild_bird_month"])
 
     st.subheader("Commercial Bird Flu Outbreaks")
     show_bird_flu_trends()
 
     st.subheader("Wild Bird Infections Map")
-    show_wild_bird_map(wild_grouped, bird_data_state, valid_states)
+    show_wild_bird_map(state_cube, valid_states)
     
     st.subheader("Bird Flu County Level Data")
-    show_flock_county_choropleth(bird_data_county)
+    show_flock_county_choropleth(county_store)
+
+    st.subheader("Outbreak Leaderboard")
+    show_outbreak_leaderboard(state_cube["labels"])
 
 # === TAB 3 ===
+@profiled("tab")
 def render_tab3_egg_stocks():
     
     stock_option = st.selectbox(
@@ -137,10 +145,11 @@ def render_tab3_egg_stocks():
     show_price_comparison(egg_data, selected_stock_df, stock_name=stock_option)
 
 # === TAB 4 ===
+@profiled("tab")
 def render_tab4_dashboard():
     show_combined_dashboard()
 
-st.markdown("---")
+    st.markdown("---")
     st.header("Key Insights from Combined Data")
 
     st.subheader("1. Avian Flu Outbreaks Coincide with Stock Price Spikes")
@@ -175,6 +184,7 @@ st.markdown("---")
     """)
 
 # === TAB 5 ===
+@profiled("tab")
 def render_tab5_appendix():
     st.title("📚 Appendix")
     st.markdown("""
@@ -1,19 +1,32 @@
 # app_modules/visualizations_app.py
 
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import requests
+from .cumulative import county_store_view, state_cube_view
+from .helper_modules.geo_assets import featureidkey, geo_subset, lod_for_zoom
+from .profiler import plotly_chart, profiled
+from .query_gbq import recent_query_stats
 from .functions_app import (
     prep_bird_flu_data,
+    prep_outbreak_leaderboard,
     prep_stock_price_data,
 )
 
+# Initial zoom of the US maps; shapes are simplified to match it
+MAP_ZOOM = 3
+
+# The query diagnostics panel is hidden unless the page is opened with
+# ?diagnostics=1 or this env var is 1
+DIAGNOSTICS_ENV = "CHICKEN_EGG_DIAGNOSTICS"
+
 
 
 # === 1. EGG PRICE vs STOCK PRICE TIME SERIES ===
+@profiled("figure")
 def show_price_comparison(egg_df, stock_df, stock_name="Selected Stock"):
     """
     Plots a dual-axis time series chart comparing egg prices with a selected stock.
@@ -43,9 +56,10 @@ def show_price_comparison(egg_df, stock_df, stock_name="Selected Stock"):
     fig.update_yaxes(title_text="Egg Price (USD)", secondary_y=False)
     fig.update_yaxes(title_text="Stock Price (USD)", secondary_y=True)
 
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
 # === 2. AVIAN FLU OUTBREAK TRENDS ===
+@profiled("figure")
 def show_bird_flu_trends():
     flu_df = prep_bird_flu_data('bird_flu', group_by="none")
 
@@ -60,9 +74,10 @@ def show_bird_flu_trends():
         labels={"Flock Size": "Number of Birds"},
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
 # === 3. COMBINED OVERVIEW ===
+@profiled("figure")
 def show_combined_dashboard():
     
     #Loading data; got rid of egg data for now
@@ -91,62 +106,41 @@ def show_combined_dashboard():
     fig.update_yaxes(title_text="Flock Size (Bird Flu)", secondary_y=False)
     fig.update_yaxes(title_text="Stock Price (USD)", secondary_y=True)
 
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
-def show_wild_bird_map(wild_grouped, flock_grouped, valid_states):
+@profiled("figure")
+def show_wild_bird_map(state_cube, valid_states):
     """
     Displays a cumulative-progressive map:
     State color = chicken deaths (Sum of Flock Size)
     Circles = wild bird infections (Sum of Wild Birds)
     Data accumulates progressively from Jan 2022.
-    Requires https://raw.githubusercontent.com/advanced-computing/chicken_egg/main/app_data/us_states.geojson
+    state_cube comes from prep_state_cube, so each slider position is a lookup.
+    State shapes come from the local asset store (app_data/us_states.geojson).
     """
 
-    # Cargar el GeoJSON de estados
-    url = "https://raw.githubusercontent.com/advanced-computing/chicken_egg/main/app_data/us_states.geojson"
-    response = requests.get(url)
-    geojson = response.json()
-
-    # creating features for map
-    geojson["features"] = [
-        f for f in geojson["features"]
-        if f["properties"]["NAME"] in valid_states]
-
-    # Combining dataframes
-    merged = pd.merge(flock_grouped, 
-                      wild_grouped, 
-                      on=['Month', 'State'], 
-                      how='left',
-                      suffixes=('', '_wild')
-    )
-    
-    merged['Wild Count'] = merged['Wild Count'].fillna(0)
+    # State shapes limited to states with wild bird data, parsed once per process
+    geojson = geo_subset("states", valid_states, lod=lod_for_zoom(MAP_ZOOM))
 
     # Month selector
-    month_options = merged[['Month', 'Month_str']].drop_duplicates().sort_values('Month')
-    month_strs = month_options['Month_str'].tolist()
+    month_strs = state_cube["labels"]
+    if not month_strs:
+        st.info("No data available up to this date.")
+        return
+
     selected_label = st.select_slider(
         "Progressive Timeline (Cumulative to...)", 
         options=month_strs, 
         value=month_strs[-1]
     )
-    
-    selected_cutoff = pd.to_datetime(selected_label, format='%b %Y')
 
-    cumulative_view = merged[merged['Month'] <= selected_cutoff]
+    # Cumulative sums by state up to the selected month
+    view = state_cube_view(state_cube, selected_label)
 
-    if cumulative_view.empty:
+    if view.empty:
         st.info("No data available up to this date.")
         return
 
-    # Sum by state
-    view = cumulative_view.groupby("State").agg({
-        "Flock Size": "sum",
-        "Wild Count": "sum",
-        "lat": "mean",
-        "lng": "mean"
-    }).reset_index()
-
     # Hover info
     view["Hover"] = (
         "State: " + view["State"] +
@@ -159,12 +153,12 @@ def show_wild_bird_map(wild_grouped, flock_grouped, valid_states):
         view,
         geojson=geojson,
         locations="State",
-        featureidkey="properties.NAME",
+        featureidkey=featureidkey("states"),
         color="Flock Size",
         color_continuous_scale="YlOrRd",
         range_color=(0, view["Flock Size"].max()),
         mapbox_style="carto-darkmatter",
-        zoom=3,
+        zoom=MAP_ZOOM,
         center={"lat": 37.8, "lon": -96},
         opacity=0.6,
         labels={"Flock Size": "Flock Deaths"},
@@ -204,71 +198,58 @@ def show_wild_bird_map(wild_grouped, flock_grouped, valid_states):
     - Use the slider to view how both have progressed from Jan 2022 until now.
     """)
     
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
 
-def show_flock_county_choropleth(flock_grouped):
+@profiled("figure")
+def show_flock_county_choropleth(county_store):
     """
     Displays a cumulative-progressive choropleth map of U.S. counties 
     showing the number of chicken deaths (Flock Size). Data accumulates 
     progressively from January 2022 until the selected month using a slider.
     
     This function requires:
-    - flock_grouped: a DataFrame that contains columns:
-         • "Month" (date or comparable numeric type)
-         • "Month_str" (a string representation, e.g. "Jan 2022")
-         • "Flock Size" (numeric value to aggregate)
-         • "fips" (county FIPS codes as strings or numbers matching the geojson)
-    - A GeoJSON file for U.S. counties (FIPS-based). In this example we use Plotly's 
-      counties GeoJSON.
+    - county_store: the sparse cumulative store from prep_county_store, which
+      returns the per-county running totals for any month directly
+    - A GeoJSON file for U.S. counties (FIPS-based). We use Plotly's counties
+      GeoJSON, kept locally in app_data/geojson-counties-fips.json.
     """
     
-    # Load the county GeoJSON (FIPS-coded) from Plotly's dataset
-    geojson_url = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
-    response = requests.get(geojson_url)
-    counties_geojson = response.json()
-    
     # Create a month selector slider for the cumulative view
-    month_options = flock_grouped[['Month', 'Month_str']].drop_duplicates().sort_values('Month')
-    month_strs = month_options['Month_str'].tolist()
+    month_strs = county_store["labels"]
+    if not month_strs:
+        st.info("No data available.")
+        return
+
     selected_label = st.select_slider(
         "Progressive Timeline (Cumulative to...)", 
         options=month_strs, 
         value=month_strs[-1],
         key="county_cloropleth_slider"
     )
-    # Convert the selected label to a datetime object (adjust format if necessary)
-    selected_cutoff = pd.to_datetime(selected_label, format='%b %Y')
     
-    # Filter the data up to the selected month
-    cumulative_view = flock_grouped[flock_grouped['Month'] <= selected_cutoff]
+    # Cumulative Flock Size by county (FIPS) up to the selected month
+    view = county_store_view(county_store, selected_label)
     
-    if cumulative_view.empty:
+    if view.empty:
         st.info("No data available.")
         return
     
-    # Aggregate (cumulative) Flock Size by county using the 'fips' code
-    view = cumulative_view.groupby("fips").agg({
-        "Flock Size": "sum"
-    }).reset_index()
-    
-    # Optionally, if your data also contains county names (e.g., in a "County" column),
-    # you can add that information to enhance hover text.
-    if "County" in cumulative_view.columns:
-        county_names = cumulative_view.groupby("fips")["County"].first().reset_index().rename(
-            columns={"County": "CountyName"}
-        )
-        view = pd.merge(view, county_names, on="fips", how="left")
+    # County names are precomputed in the store when the data has them
+    if "CountyName" in view.columns:
         view["Hover"] = (
-            "County: " + view["CountyName"].astype(str) +
+            "County: " + view["CountyName"] +
             "<br>Flock Deaths: " + view["Flock Size"].astype(int).astype(str)
         )
     else:
         view["Hover"] = (
-            "FIPS Code: " + view["fips"].astype(str) +
+            "FIPS Code: " + view["fips"] +
             "<br>Flock Deaths: " + view["Flock Size"].astype(int).astype(str)
         )
     
+    # Only the shapes of counties with outbreaks so far are sent to the browser
+    counties_geojson = geo_subset("counties", view["fips"], lod=lod_for_zoom(MAP_ZOOM))
+
     # Create the choropleth map using Plotly Express.
     # Note: The GeoJSON from Plotly expects each feature's id property to be the county FIPS code.
     fig = px.choropleth_mapbox(
@@ -279,12 +260,12 @@ def show_flock_county_choropleth(flock_grouped):
         color_continuous_scale="YlOrRd",
         range_color=(0, view["Flock Size"].max()),
         mapbox_style="carto-darkmatter",
-        zoom=3,
+        zoom=MAP_ZOOM,
         center={"lat": 37.8, "lon": -96},
         opacity=0.6,
         labels={"Flock Size": "Flock Deaths"},
         height=600,
-        featureidkey="id"  # Use the 'id' field in geojson features for matching FIPS codes
+        featureidkey=featureidkey("counties")  # Use the 'id' field in geojson features for matching FIPS codes
     )
     
     fig.update_layout(
@@ -301,4 +282,80 @@ def show_flock_county_choropleth(flock_grouped):
     - **County Color**: Number of chickens lost due to outbreaks (Flock Size)  
     """)
     
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    plotly_chart(fig)
+
+
+@profiled("figure")
+def show_outbreak_leaderboard(month_labels, k=20):
+    """
+    Ranks the states or counties with the most flock deaths inside a
+    selectable month window. Rankings come from prep_outbreak_leaderboard,
+    which subtracts two cumulative snapshots instead of re-reading bird_flu.
+    """
+    if not month_labels:
+        st.info("No data available.")
+        return
+
+    level = st.radio("Rank by", ["County", "State"], horizontal=True, key="leaderboard_level")
+    start_label, end_label = st.select_slider(
+        "Outbreak window",
+        options=month_labels,
+        value=(month_labels[0], month_labels[-1]),
+        key="leaderboard_window"
+    )
+
+    leaders = prep_outbreak_leaderboard(level.lower(), start_label, end_label, k=k)
+
+    if leaders.empty:
+        st.info("No outbreaks in this window.")
+        return
+
+    fig = px.bar(
+        leaders,
+        x="Flock Deaths",
+        y=level,
+        orientation="h",
+        title=f"🏆 Top {len(leaders)} {level.lower()} outbreaks, {start_label} – {end_label}",
+        color="Flock Deaths",
+        color_continuous_scale="YlOrRd",
+        height=max(400, 28 * len(leaders)),
+    )
+    fig.update_yaxes(autorange="reversed", title_text="")
+
+    plotly_chart(fig)
+
+
+# === QUERY DIAGNOSTICS ===
+def diagnostics_enabled():
+    return st.query_params.get("diagnostics") == "1" or os.getenv(DIAGNOSTICS_ENV) == "1"
+
+
+def show_query_diagnostics(recent=50):
+    """
+    Sidebar panel with the cost of the queries behind the dashboard
+    (see query_gbq.recent_query_stats): totals, a rollup per prep function
+    and the most recent queries. Stats are per server process, so they
+    include the queries of every session it serves.
+    """
+    stats = pd.DataFrame(recent_query_stats())
+    with st.sidebar.expander("🔧 Query diagnostics"):
+        if stats.empty:
+            st.write("No queries yet.")
+            return
+        st.caption("Queries from all sessions on this server process.")
+
+        stats["bytes_billed"] = pd.to_numeric(stats["bytes_billed"])
+        billed = stats["bytes_billed"].sum()
+        st.write(
+            f"{len(stats)} queries, {int(stats['cache_hit'].sum())} cache hits, "
+            f"{stats['seconds'].sum():.2f}s, {billed / 1e6:.1f} MB billed"
+        )
+        by_caller = stats.groupby("caller").agg(
+            queries=("table", "size"),
+            cache_hits=("cache_hit", "sum"),
+            seconds=("seconds", "sum"),
+            mb_billed=("bytes_billed", lambda b: b.sum() / 1e6),
+        ).sort_values("seconds", ascending=False)
+        st.dataframe(by_caller)
+
+        st.dataframe(stats.tail(recent).iloc[::-1], hide_index=True)
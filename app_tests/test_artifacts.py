@@ -0,0 +1,67 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pytest
+from app_modules.helper_modules import artifacts
+from app_modules.helper_modules.artifacts import read_artifact, to_artifact_table, write_artifact
+
+
+def test_to_artifact_table_coerces_to_schema():
+    table = to_artifact_table("egg_prices", pd.DataFrame({"Date": ["2024-01-01"], "Avg_Price": ["$3.10"]}))
+
+    assert table.schema == artifacts.ARTIFACT_SCHEMAS["egg_prices"]
+    assert table["Avg_Price"].to_pylist() == [3.1]
+
+
+def test_to_artifact_table_rejects_missing_columns_and_dates():
+    with pytest.raises(ValueError, match="missing columns"):
+        to_artifact_table("egg_prices", pd.DataFrame({"Date": ["2024-01-01"]}))
+    with pytest.raises(ValueError, match="Date"):
+        to_artifact_table("egg_prices", pd.DataFrame({"Date": ["soon"], "Avg_Price": [1.0]}))
+
+
+def test_write_artifact_exports_csv_only_when_asked(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    df = pd.DataFrame({"Date": ["2024-01-01"], "Avg_Price": [3.1]})
+    csv_path = str(tmp_path / "eggs.csv")
+
+    monkeypatch.delenv(artifacts.EXPORT_CSV_ENV, raising=False)
+    write_artifact("egg_prices", df, csv_path=csv_path)
+    assert not os.path.exists(csv_path)
+    assert read_artifact("egg_prices")["Date"].type == pa.date32()
+
+    monkeypatch.setenv(artifacts.EXPORT_CSV_ENV, "1")
+    write_artifact("egg_prices", df, csv_path=csv_path)
+    assert pd.read_csv(csv_path)["Avg_Price"].tolist() == [3.1]
+
+
+def test_is_built_from_only_after_a_successful_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    download = tmp_path / "body.csv"
+    download.write_text("Date,Avg_Price\n2024-01-01,3.1\n")
+    assert not artifacts.is_built_from("egg_prices", str(download))
+
+    write_artifact("egg_prices", pd.DataFrame({"Date": ["2024-01-01"], "Avg_Price": [3.1]}), source_file=str(download))
+    assert artifacts.is_built_from("egg_prices", str(download))
+
+    # A new body whose clean fails keeps the old record, so the next run retries it
+    download.write_text("Date,Avg_Price\nsoon,3.2\n")
+    with pytest.raises(ValueError):
+        write_artifact("egg_prices", pd.DataFrame({"Date": ["soon"], "Avg_Price": [3.2]}), source_file=str(download))
+    assert not artifacts.is_built_from("egg_prices", str(download))
+
+
+def test_failed_chunk_leaves_artifact_and_csv_untouched(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setenv(artifacts.EXPORT_CSV_ENV, "1")
+    csv_path = str(tmp_path / "eggs.csv")
+    good = pd.DataFrame({"Date": ["2024-01-01"], "Avg_Price": [3.1]})
+    write_artifact("egg_prices", good, csv_path=csv_path)
+
+    chunks = [pd.DataFrame({"Date": ["2024-02-01"], "Avg_Price": [3.2]}), pd.DataFrame({"Date": ["soon"], "Avg_Price": [1.0]})]
+    with pytest.raises(ValueError):
+        artifacts.write_artifact_chunks("egg_prices", chunks, csv_path=csv_path)
+
+    assert read_artifact("egg_prices")["Avg_Price"].to_pylist() == [3.1]
+    assert pd.read_csv(csv_path)["Avg_Price"].tolist() == [3.1]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["egg_prices.parquet", "eggs.csv"]
@@ -0,0 +1,27 @@
+import pytest
+from app_modules.helper_modules.artifacts import to_artifact_table
+from benchmarks.run_benchmarks import find_regressions
+from benchmarks.synthetic import make_tables
+
+
+def test_synthetic_tables_match_artifact_schemas():
+    tables = make_tables(scale=2)
+
+    assert len(tables["bird_flu"]) == 2 * len(make_tables(scale=1)["bird_flu"])
+    for name, df in tables.items():
+        to_artifact_table(name, df)  # raises on missing columns or empty dates
+    assert tables["bird_flu"]["fips"].str.len().eq(5).all()
+
+
+def _report(**medians):
+    return {"results": {"1x": {"cases": {case: {"median": m} for case, m in medians.items()}}}}
+
+
+@pytest.mark.parametrize("new, regressed", [(0.12, False), (0.2, True), (0.005, False)])
+def test_find_regressions_uses_threshold_and_noise_floor(new, regressed):
+    baseline = _report(prep=0.1, tiny=0.001)
+    report = _report(prep=new, tiny=0.005, added=1.0)
+
+    found = find_regressions(report, baseline, threshold=0.25)
+
+    assert [case for _, case, _, _ in found] == (["prep"] if regressed else [])
@@ -0,0 +1,46 @@
+import pandas as pd
+from app_bigquery import clean_stocks
+from app_bigquery.clean_stocks import fetch_stock_data
+from app_bigquery.etl_runner import UNCHANGED
+from app_modules.helper_modules import artifacts
+
+
+def _nasdaq(*days):
+    rows = [
+        {"date": day, "close": f"${price}", "volume": "1,000", "open": f"${price}", "high": f"${price}", "low": f"${price}"}
+        for day, price in days
+    ]
+    return {"data": {"tradesTable": {"rows": rows}}}
+
+
+def test_fetch_requests_only_missing_days(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    pd.DataFrame({
+        "Date": ["2025-04-21", "2025-04-22"], "Close_Last": [90.0, 93.0], "Volume": [1000.0, 1000.0],
+        "Open": [90.0, 93.0], "High": [90.0, 93.0], "Low": [90.0, 93.0],
+    }).to_csv(tmp_path / "calm.csv", index=False)
+    urls = []
+
+    def fake_fetch_json(url, headers=None):
+        urls.append(url)
+        return _nasdaq(("04/23/2025", "95.50"), ("04/22/2025", "93.50"))
+
+    monkeypatch.setattr(clean_stocks, "fetch_json", fake_fetch_json)
+    df = fetch_stock_data("CALM", "calm.csv", out_dir=str(tmp_path))
+
+    assert "fromdate=2025-04-22" in urls[0]
+    saved = artifacts.read_artifact("calmaine").to_pandas()
+    assert saved["Date"].astype(str).tolist() == ["2025-04-21", "2025-04-22", "2025-04-23"]
+    assert saved["Close_Last"].tolist() == [90.0, 93.5, 95.5]
+    assert len(df) == 3
+
+
+def test_fetch_reports_unchanged_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(clean_stocks, "fetch_json", lambda url, headers=None: _nasdaq(("04/22/2025", "93.00")))
+    fetch_stock_data("CALM", "calm.csv", out_dir=str(tmp_path))
+
+    assert fetch_stock_data("CALM", "calm.csv", out_dir=str(tmp_path)) == UNCHANGED
+
+    monkeypatch.setattr(clean_stocks, "fetch_json", lambda url, headers=None: {"data": None})
+    assert fetch_stock_data("CALM", "calm.csv", out_dir=str(tmp_path)) == UNCHANGED
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from app_modules.cumulative import build_county_store, build_state_cube
+from app_modules.helper_modules.compact import compact_frame, month_key
+
+
+def make_flock():
+    return pd.DataFrame({
+        "Month": pd.to_datetime(["2022-01-01", "2022-01-01", "2022-02-01"]),
+        "State": ["Iowa", "Ohio", "Iowa"],
+        "County": ["Sac", "Wood", "Sac"],
+        "fips": ["19161", "39173", None],
+        "Flock Size": [100, 50, 25],
+        "lat": [42.0, 40.0, np.nan],
+        "lng": [-93.0, -82.0, np.nan],
+        "Month_str": ["Jan 2022", "Jan 2022", "Feb 2022"],
+    })
+
+
+def test_compact_frame_narrows_dtypes():
+    df = compact_frame(make_flock())
+
+    assert df["State"].dtype == "category" and df["Month_str"].dtype == "category"
+    assert df["fips"].dtype == "Int32" and df["fips"].isna().tolist() == [False, False, True]
+    assert df["lat"].dtype == np.float32
+    assert df["MonthKey"].dtype == np.int16
+    assert df["MonthKey"].tolist() == [2022 * 12, 2022 * 12, 2022 * 12 + 1]
+
+
+def test_month_key_orders_like_months():
+    keys = month_key(pd.to_datetime(["2021-12-01", "2022-01-01"]))
+    assert keys[1] - keys[0] == 1
+
+
+def test_cumulative_structures_ignore_compaction():
+    wild = pd.DataFrame({"Month": pd.to_datetime(["2022-01-01", "2022-01-01"]), "State": ["Texas", "Iowa"], "Wild Count": [3, 1]})
+    plain = build_state_cube(make_flock(), wild)
+    compact = build_state_cube(compact_frame(make_flock()), compact_frame(wild.copy()))
+
+    assert compact["states"] == plain["states"] == ["Iowa", "Ohio", "Texas"]
+    assert np.allclose(compact["lat_sum"], plain["lat_sum"])
+
+    store = build_county_store(compact_frame(make_flock()))
+    assert store["fips"].tolist() == [19161, 39173]
+    assert store["county_names"].tolist() == ["Sac", "Wood"]
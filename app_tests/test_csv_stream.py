@@ -0,0 +1,39 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from app_bigquery.clean_wild_birds import clean_wild_birds
+from app_modules.helper_modules import artifacts
+from app_modules.helper_modules.csv_stream import iter_csv_chunks
+
+RAW = (
+    '"State","County","Collection Date","Date Detected","HPAI Strain","Bird Species"\n'
+    + "".join(f'"minnesota","scott county","3/20/2025","4/{day}/2025","EA H5","Mallard"\n' for day in range(1, 29))
+)
+
+
+def test_iter_csv_chunks_reads_only_needed_columns(tmp_path):
+    path = tmp_path / "raw.csv"
+    path.write_text(RAW.replace('"State",', '" State ",', 1))
+
+    chunks = list(iter_csv_chunks(str(path), ["State", "Date Detected"], block_size=256))
+
+    assert len(chunks) > 1
+    assert all(chunk.columns.tolist() == ["State", "Date Detected"] for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 28
+
+    with pytest.raises(ValueError, match="Flock Size"):
+        next(iter_csv_chunks(str(path), ["Flock Size"]))
+
+
+def test_clean_wild_birds_streams_chunks_into_one_artifact(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    raw = tmp_path / "raw.csv"
+    raw.write_text(RAW)
+
+    path = clean_wild_birds(str(raw), str(tmp_path / "wild_birds.csv"), block_size=256)
+
+    assert pq.ParquetFile(path).num_row_groups > 1
+    df = pd.read_parquet(path)
+    assert df.columns.tolist() == artifacts.ARTIFACT_SCHEMAS["wild_birds"].names
+    assert len(df) == 28 and df["State"].unique().tolist() == ["Minnesota"]
+    assert str(df["Date Detected"].iloc[-1]) == "2025-04-28"
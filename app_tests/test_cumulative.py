@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from app_modules.cumulative import (
+    build_county_store,
+    build_state_cube,
+    county_store_view,
+    extend_state_cube,
+    state_cube_view,
+    state_cube_window,
+    top_k,
+)
+
+
+def make_flock():
+    return pd.DataFrame({
+        "Month": pd.to_datetime(["2022-01-01", "2022-01-01", "2022-02-01", "2022-03-01"]),
+        "State": ["Iowa", "Ohio", "Iowa", "Ohio"],
+        "Flock Size": [100, 50, 25, 10],
+        "lat": [42.0, 40.0, 43.0, np.nan],
+        "lng": [-93.0, -82.0, -94.0, np.nan],
+    })
+
+
+def make_wild():
+    return pd.DataFrame({
+        "Month": pd.to_datetime(["2022-01-01", "2022-03-01", "2022-03-01"]),
+        "State": ["Iowa", "Iowa", "Texas"],
+        "Wild Count": [3, 4, 7],
+    })
+
+
+def test_state_cube_view_matches_cumulative_groupby():
+    cube = build_state_cube(make_flock(), make_wild())
+
+    view = state_cube_view(cube, "Feb 2022").set_index("State")
+
+    assert cube["labels"] == ["Jan 2022", "Feb 2022", "Mar 2022"]
+    assert view.loc["Iowa", "Flock Size"] == 125
+    assert view.loc["Iowa", "Wild Count"] == 3
+    assert view.loc["Iowa", "lat"] == 42.5
+    assert "Texas" not in view.index
+
+
+def test_extend_state_cube_equals_rebuild():
+    flock, wild = make_flock(), make_wild()
+    cube = build_state_cube(flock[flock["Month"] < "2022-03-01"], wild[wild["Month"] < "2022-02-01"])
+
+    # The last month is reloaded together with the new one
+    extended = extend_state_cube(
+        cube, flock[flock["Month"] >= "2022-02-01"], wild[wild["Month"] >= "2022-02-01"])
+    rebuilt = build_state_cube(flock, wild)
+
+    assert extended["labels"] == rebuilt["labels"]
+    assert extended["states"] == rebuilt["states"]
+    for measure in ["Flock Size", "Wild Count", "lat_sum", "lat_n"]:
+        assert np.array_equal(extended[measure], rebuilt[measure])
+
+
+def test_county_store_view_returns_running_totals():
+    county_grouped = pd.DataFrame({
+        "Month": pd.to_datetime(["2022-01-01", "2022-01-01", "2022-03-01", "2022-03-01"]),
+        "County": ["Butte", "Miner", "Butte", "Sioux"],
+        "fips": ["06007", "46097", "06007", "19167"],
+        "Flock Size": [70, 1500, 30, 5],
+    })
+    store = build_county_store(county_grouped)
+
+    jan = county_store_view(store, "Jan 2022").set_index("fips")
+    mar = county_store_view(store, "Mar 2022").set_index("fips")
+
+    assert jan["Flock Size"].to_dict() == {"06007": 70, "46097": 1500}
+    assert mar["Flock Size"].to_dict() == {"06007": 100, "19167": 5, "46097": 1500}
+    assert mar.loc["19167", "CountyName"] == "Sioux"
+    assert len(store["event_total"]) == 4
+
+
+def test_window_totals_and_top_k():
+    cube = build_state_cube(make_flock(), make_wild())
+
+    totals = state_cube_window(cube, "Feb 2022", "Mar 2022")
+
+    assert dict(zip(cube["states"], totals))["Iowa"] == 25
+    assert top_k(cube["states"], totals, k=1) == [("Iowa", 25.0)]
+    assert top_k(cube["states"], state_cube_window(cube, "Jan 2021", "Dec 2021")) == []
@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+from app_modules import data_sources
+from app_modules.helper_modules import artifacts
+from app_modules.data_sources import get_data_source, register_memory_table
+from app_modules.query_gbq import query_table
+
+
+def test_get_data_source_reads_env(monkeypatch):
+    monkeypatch.setenv("CHICKEN_EGG_DATA_SOURCE", "DuckDB")
+    assert get_data_source() == "duckdb"
+    assert get_data_source("memory") == "memory"
+
+    with pytest.raises(ValueError):
+        get_data_source("sqlite")
+
+
+def test_memory_source_selects_columns():
+    register_memory_table("test_memory_select", pd.DataFrame({
+        "State": ["Iowa", "Ohio"],
+        "Flock Size": [10, 20],
+    }))
+
+    df = query_table("test_memory_select", columns=["Flock Size"], source="memory")
+
+    assert df.columns.tolist() == ["Flock Size"]
+    assert df["Flock Size"].tolist() == [10, 20]
+
+
+def test_memory_source_rejects_missing_columns():
+    register_memory_table("test_memory_missing", pd.DataFrame({"State": ["Iowa"]}))
+
+    with pytest.raises(ValueError):
+        query_table("test_memory_missing", columns=["County"], source="memory")
+
+
+def test_duckdb_source_reads_etl_output(tmp_path, monkeypatch):
+    csv_dir = tmp_path / "app_data"
+    csv_dir.mkdir()
+    pd.DataFrame({
+        "Unnamed: 0": [0, 1],
+        "County": ["Butte", "Adair"],
+        "State": ["California", "Iowa"],
+        "Outbreak Date": ["2024-12-31", "2025-01-02"],
+        "Flock Type": ["x", "y"],
+        "Flock Size": [70, 1500],
+        "State Abbrev": ["CA", "IA"],
+        "fips": [6007.0, 19001.0],
+        "lng": [-121.6, -94.5],
+        "lat": [39.6, 41.3],
+    }).to_csv(csv_dir / "bird_flu.csv", index=False)
+    monkeypatch.setattr(data_sources, "LOCAL_DATA_DIR", str(csv_dir))
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path / "parquet"))
+
+    df = data_sources.query_duckdb("bird_flu", columns=["fips", "Outbreak Date", "Flock Size"])
+
+    assert df["fips"].tolist() == ["06007", "19001"]
+    assert pd.api.types.is_datetime64_any_dtype(df["Outbreak Date"])
+    assert df["Flock Size"].sum() == 1570
+
+
+def test_duckdb_source_never_replaces_an_artifact_with_the_csv(tmp_path, monkeypatch):
+    csv_dir = tmp_path / "app_data"
+    csv_dir.mkdir()
+    monkeypatch.setattr(data_sources, "LOCAL_DATA_DIR", str(csv_dir))
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path / "parquet"))
+
+    # A CSV missing schema columns is not written to the artifact path
+    pd.DataFrame({"Date": ["2024-01-01"]}).to_csv(csv_dir / "cleaned_egg_prices.csv", index=False)
+    with pytest.raises(ValueError, match="missing columns"):
+        data_sources.local_table_path("egg_prices")
+    assert not (tmp_path / "parquet" / "egg_prices.parquet").exists()
+
+    # An ETL artifact wins over a CSV touched later (e.g. by a checkout)
+    artifacts.write_artifact("egg_prices", pd.DataFrame({"Date": ["2024-02-01"], "Avg_Price": [3.5]}))
+    pd.DataFrame({"Date": ["2024-01-01"], "Avg_Price": [2.0]}).to_csv(csv_dir / "cleaned_egg_prices.csv", index=False)
+    assert data_sources.query_duckdb("egg_prices", columns=["Avg_Price"])["Avg_Price"].tolist() == [3.5]
+
+
+class FakeQueryJob:
+    def __init__(self, df):
+        self.df = df
+
+    def to_dataframe(self, create_bqstorage_client=True):
+        return self.df
+
+
+class FakeClient:
+    """Answers the catalog queries and counts every round trip."""
+
+    def __init__(self):
+        self.queries = []
+        self.modified = 1
+
+    def query(self, sql, job_config=None):
+        self.queries.append(sql)
+        if "INFORMATION_SCHEMA" in sql:
+            return FakeQueryJob(pd.DataFrame({
+                "table_name": ["bird_flu", "bird_flu"],
+                "column_name": ["State", "Flock Size"],
+                "last_modified_time": [self.modified, self.modified],
+            }))
+        return FakeQueryJob(pd.DataFrame({"table_id": ["bird_flu"], "last_modified_time": [self.modified]}))
+
+
+def test_schema_catalog_refreshes_only_on_change(monkeypatch):
+    from app_modules import query_gbq
+
+    client = FakeClient()
+    monkeypatch.setattr(query_gbq, "get_client", lambda: client)
+    monkeypatch.setattr(query_gbq, "_catalogs", {})
+
+    assert query_gbq.get_table_columns("bird_flu", "p") == ["State", "Flock Size"]
+    assert query_gbq.get_table_columns("bird_flu", "p") == ["State", "Flock Size"]
+    assert len(client.queries) == 1
+
+    # An unchanged table costs one metadata check, a modified one reloads the catalog
+    query_gbq.get_table_columns("bird_flu", "p", refresh=True)
+    assert len(client.queries) == 2
+    client.modified = 2
+    query_gbq.get_table_columns("bird_flu", "p", refresh=True)
+    assert len(client.queries) == 4
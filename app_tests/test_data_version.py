@@ -0,0 +1,96 @@
+import pandas as pd
+from app_modules import query_gbq
+from app_modules.data_sources import register_memory_table
+from app_modules.query_gbq import cache_by_data_version, data_version, query_table
+
+calls = []
+
+
+@cache_by_data_version
+def prep_versioned_rows(table_name):
+    calls.append(table_name)
+    return query_table(table_name, columns=["State"], source="memory")
+
+
+def test_cache_is_reused_until_the_table_is_reloaded(monkeypatch):
+    monkeypatch.setenv("CHICKEN_EGG_DATA_SOURCE", "memory")
+    register_memory_table("test_version_rows", pd.DataFrame({"State": ["Iowa"]}))
+    calls.clear()
+
+    assert len(prep_versioned_rows("test_version_rows")) == 1
+    assert len(prep_versioned_rows("test_version_rows")) == 1
+    assert calls == ["test_version_rows"]
+
+    register_memory_table("test_version_rows", pd.DataFrame({"State": ["Iowa", "Ohio"]}))
+    assert len(prep_versioned_rows("test_version_rows")) == 2
+    assert calls == ["test_version_rows"] * 2
+
+
+@cache_by_data_version(tables=["table_name"])
+def prep_table_rows(table_name):
+    calls.append(table_name)
+    return query_table(table_name, columns=["State"], source="memory")
+
+
+def test_loading_other_tables_keeps_the_entry(monkeypatch):
+    monkeypatch.setenv("CHICKEN_EGG_DATA_SOURCE", "memory")
+    register_memory_table("test_version_read", pd.DataFrame({"State": ["Iowa"]}))
+    register_memory_table("test_version_other", pd.DataFrame({"State": ["Ohio"]}))
+    calls.clear()
+
+    prep_table_rows("test_version_read")
+    register_memory_table("test_version_other", pd.DataFrame({"State": ["Utah"]}))
+    prep_table_rows("test_version_read")
+    assert calls == ["test_version_read"]
+
+    register_memory_table("test_version_read", pd.DataFrame({"State": ["Iowa", "Ohio"]}))
+    assert len(prep_table_rows("test_version_read")) == 2
+    assert calls == ["test_version_read"] * 2
+
+
+def test_data_version_changes_only_for_its_tables():
+    register_memory_table("test_version_a", pd.DataFrame({"State": ["Iowa"]}))
+    register_memory_table("test_version_b", pd.DataFrame({"State": ["Ohio"]}))
+    before_a = data_version(["test_version_a"], source="memory")
+    before_b = data_version(["test_version_b"], source="memory")
+
+    register_memory_table("test_version_b", pd.DataFrame({"State": ["Utah"]}))
+
+    assert data_version(["test_version_a"], source="memory") == before_a
+    assert data_version(["test_version_b"], source="memory") != before_b
+
+
+def test_bigquery_versions_are_checked_at_most_once_per_interval(monkeypatch):
+    checks = []
+    monkeypatch.setattr(query_gbq, "_versions", {})
+    monkeypatch.setattr(query_gbq, "table_modified_times", lambda project_id: checks.append(project_id) or {"bird_flu": 1})
+
+    for _ in range(5):
+        data_version(source="bigquery", project_id="p")
+    assert checks == ["p"]
+
+    monkeypatch.setattr(query_gbq, "VERSION_CHECK_SECONDS", 0)
+    data_version(source="bigquery", project_id="p")
+    assert checks == ["p", "p"]
+
+
+def test_failed_bigquery_check_keeps_serving_cached_results(monkeypatch):
+    monkeypatch.setenv("CHICKEN_EGG_DATA_SOURCE", "bigquery")
+    monkeypatch.setattr(query_gbq, "_versions", {})
+    monkeypatch.setattr(query_gbq, "table_modified_times", lambda project_id: {"bird_flu": 1})
+    calls.clear()
+
+    @cache_by_data_version
+    def prep_versioned_totals():
+        calls.append(1)
+        return 5
+
+    assert prep_versioned_totals() == 5
+
+    def offline(project_id):
+        raise ConnectionError("metadata unavailable")
+
+    monkeypatch.setattr(query_gbq, "table_modified_times", offline)
+    monkeypatch.setattr(query_gbq, "VERSION_CHECK_SECONDS", 0)
+    assert prep_versioned_totals() == 5
+    assert calls == [1]
@@ -0,0 +1,59 @@
+import time
+import pytest
+from app_bigquery.etl_runner import UNCHANGED, run_stages, stage_dependencies
+
+
+def _fail():
+    raise RuntimeError("download failed")
+
+
+def test_failure_only_skips_downstream_stages():
+    order = []
+    stages = {
+        "clean_a": {"func": _fail, "outputs": ["a.csv"]},
+        "clean_b": {"func": lambda: order.append("clean_b"), "outputs": ["b.csv"]},
+        "upload_a": {"func": lambda: order.append("upload_a"), "inputs": ["a.csv"]},
+        "upload_b": {"func": lambda: order.append("upload_b"), "inputs": ["b.csv", "raw.csv"]},
+    }
+
+    results = run_stages(stages)
+
+    assert stage_dependencies(stages) == {"clean_a": [], "clean_b": [], "upload_a": ["clean_a"], "upload_b": ["clean_b"]}
+    assert {name: r["status"] for name, r in results.items()} == {
+        "clean_a": "failed", "clean_b": "ok", "upload_a": "skipped", "upload_b": "ok",
+    }
+    assert order == ["clean_b", "upload_b"]
+
+
+def test_independent_stages_run_concurrently():
+    stages = {name: {"func": lambda: time.sleep(0.2), "outputs": [f"{name}.csv"]} for name in "abc"}
+
+    start = time.perf_counter()
+    run_stages(stages)
+
+    assert time.perf_counter() - start < 0.5
+
+
+def test_cycles_and_duplicate_outputs_are_rejected():
+    with pytest.raises(ValueError):
+        run_stages({
+            "a": {"func": lambda: None, "inputs": ["b.csv"], "outputs": ["a.csv"]},
+            "b": {"func": lambda: None, "inputs": ["a.csv"], "outputs": ["b.csv"]},
+        })
+    with pytest.raises(ValueError):
+        stage_dependencies({"a": {"outputs": ["x.csv"]}, "b": {"outputs": ["x.csv"]}})
+
+
+def test_unchanged_sources_skip_downstream_stages():
+    ran = []
+    stages = {
+        "clean_a": {"func": lambda: UNCHANGED, "outputs": ["a.csv"]},
+        "clean_b": {"func": lambda: ran.append("clean_b"), "outputs": ["b.csv"]},
+        "upload_a": {"func": lambda: ran.append("upload_a"), "inputs": ["a.csv"]},
+        "merge": {"func": lambda: ran.append("merge"), "inputs": ["a.csv", "b.csv"]},
+    }
+
+    results = run_stages(stages)
+
+    assert results["upload_a"]["status"] == UNCHANGED
+    assert sorted(ran) == ["clean_b", "merge"]
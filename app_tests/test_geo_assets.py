@@ -0,0 +1,59 @@
+import json
+from app_modules.helper_modules import geo_assets
+from app_modules.helper_modules.geo_assets import featureidkey, geo_subset, load_geo_asset, lod_for_zoom
+from app_modules.helper_modules.geo_simplify import simplify_geojson
+
+
+def test_county_subset_reuses_parsed_features():
+    subset = geo_subset("counties", ["06007", "19167", "99999"])
+
+    assert [f["id"] for f in subset["features"]] == ["06007", "19167"]
+    assert subset is geo_subset("counties", ["19167", "06007", "99999"])
+    assert subset["features"][0] is load_geo_asset("counties")["features"]["06007"]
+    assert featureidkey("counties") == "id"
+
+
+def test_state_subset_matches_by_name(tmp_path, monkeypatch):
+    path = tmp_path / "states.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"NAME": "Iowa"}, "geometry": None},
+        {"type": "Feature", "properties": {"NAME": "Ohio"}, "geometry": None},
+    ]}))
+    monkeypatch.setitem(geo_assets.GEO_ASSETS, "test_states", {"path": str(path), "url": None, "id": "NAME"})
+
+    subset = geo_subset("test_states", ["Ohio"])
+
+    assert [f["properties"]["NAME"] for f in subset["features"]] == ["Ohio"]
+    assert featureidkey("test_states") == "properties.NAME"
+
+
+def test_simplify_keeps_shared_borders_identical():
+    # Two squares sharing the x=1 edge, which is itself a wiggly line
+    shared = [[1.0, 0.0], [1.003, 0.25], [0.997, 0.5], [1.004, 0.75], [1.0, 1.0]]
+    left = [[0.0, 0.0]] + shared + [[0.0, 1.0], [0.0, 0.0]]
+    right = [shared[0], [2.0, 0.0], [2.0, 1.0]] + shared[::-1]
+    geojson = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "id": "L", "properties": {"NAME": "L", "extra": 1},
+         "geometry": {"type": "Polygon", "coordinates": [left]}},
+        {"type": "Feature", "id": "R", "properties": {},
+         "geometry": {"type": "Polygon", "coordinates": [right]}},
+    ]}
+
+    simplified = simplify_geojson(geojson, tolerance=0.01, digits=3, keep_properties=["NAME"])
+    left_ring, right_ring = (f["geometry"]["coordinates"][0] for f in simplified["features"])
+
+    def edge(ring):
+        return {tuple(p) for p in ring if p[0] not in (0.0, 2.0)}
+
+    assert edge(left_ring) == edge(right_ring) == {(1.0, 0.0), (1.0, 1.0)}
+    assert left_ring[0] == left_ring[-1]
+    assert simplified["features"][0]["properties"] == {"NAME": "L"}
+
+
+def test_lod_falls_back_to_full_resolution(monkeypatch, tmp_path):
+    monkeypatch.setattr(geo_assets, "LOD_DIR", str(tmp_path))
+
+    assert lod_for_zoom(3) == "low"
+    assert lod_for_zoom(6) == "medium"
+    assert lod_for_zoom(10) == "full"
+    assert load_geo_asset("counties", "tiny")["features"].keys() == load_geo_asset("counties")["features"].keys()
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from app_modules.helper_modules.geodata import ensure_geospatial, lookup_centroids, lookup_fips
+
+
+def test_lookup_fips_ignores_case_and_suffixes():
+    fips = lookup_fips(["Butte", "Mcintosh", "DeKalb County", "Nowhere"], ["CA", "ND", "GA", "CA"])
+
+    assert fips.tolist() == [6007, 38051, 13089, -1]
+
+
+def test_lookup_centroids_accepts_padded_and_missing_codes():
+    lat, lng = lookup_centroids(["06007", "6007", None, "99999"])
+
+    assert lat[0] == lat[1] and lng[0] == lng[1]
+    assert np.isnan(lat[2:]).all()
+
+
+def test_ensure_geospatial_enriches_rows():
+    df = pd.DataFrame({"State": ["California", "Iowa"], "County": ["Butte", "Nowhere"], "Flock Size": [70, 10]})
+
+    out = ensure_geospatial(df, source_name="test")
+
+    assert out["State Abbrev"].tolist() == ["CA", "IA"]
+    assert out["fips"].tolist()[0] == "6007" and pd.isna(out["fips"].tolist()[1])
+    assert round(out["lat"][0], 2) == 39.67 and np.isnan(out["lng"][1])
+    assert "fips" not in df.columns
@@ -0,0 +1,118 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from app_data.web_scraping.download_csv import download_csv, download_csv_cached
+from app_modules.helper_modules import http_fetch
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the CDC/FRED/Nasdaq endpoints."""
+    flaky_calls = 0
+    page_calls = 0
+    flocks = b"State,Flock Size\nIowa,10\n"
+
+    def do_GET(self):
+        if self.path == "/flocks.csv":
+            etag = f'"{len(StandIn.flocks)}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+            else:
+                self._send(200, StandIn.flocks, "text/csv", etag=etag)
+        elif self.path == "/page.html":
+            StandIn.page_calls += 1
+            self._send(200, b'<a href="/flocks.csv">Download CSV</a>', "text/html")
+        elif self.path == "/prices.csv":
+            self._send(200, b"Date,Avg_Price\n2024-01-01,2.5\n2024-02-01,3.0\n", "text/csv")
+        elif self.path == "/gzipped.csv":
+            self._send(200, gzip.compress(b"State,Flock Size\nIowa,10\n"), "text/csv", encoding="gzip")
+        elif self.path == "/flaky.json":
+            StandIn.flaky_calls += 1
+            if StandIn.flaky_calls < 3:
+                self._send(503, b"busy", "text/plain")
+            else:
+                self._send(200, json.dumps({"rows": [1, 2]}).encode(), "application/json")
+        elif self.path == "/down.json":
+            self._send(503, b"down", "text/plain")
+        else:
+            self._send(404, b"missing", "text/plain")
+
+    def _send(self, status, body, content_type, encoding=None, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_fetch_csv_streams_into_dataframe(server):
+    df = http_fetch.fetch_csv(f"{server}/prices.csv", parse_dates=["Date"])
+    assert df["Avg_Price"].tolist() == [2.5, 3.0]
+
+    assert http_fetch.fetch_csv(f"{server}/gzipped.csv")["Flock Size"].tolist() == [10]
+
+
+def test_fetch_retries_server_errors(server):
+    assert http_fetch.fetch_json(f"{server}/flaky.json") == {"rows": [1, 2]}
+    assert StandIn.flaky_calls == 3
+
+
+def test_fetch_raises_http_error_once_retries_run_out(server, monkeypatch):
+    monkeypatch.setattr(http_fetch, "BACKOFF_FACTOR", 0)
+    monkeypatch.setattr(http_fetch, "_session", None)
+
+    with pytest.raises(requests.HTTPError) as error:
+        http_fetch.fetch_json(f"{server}/down.json")
+    assert error.value.response.status_code == 503
+
+
+def test_fetch_raises_on_missing_and_shares_session(server, tmp_path):
+    with pytest.raises(requests.HTTPError):
+        http_fetch.fetch_text(f"{server}/missing")
+
+    path = http_fetch.download_file(f"{server}/prices.csv", str(tmp_path / "out" / "prices.csv"))
+    assert open(path).read().startswith("Date,Avg_Price")
+    assert http_fetch.get_session() is http_fetch.get_session()
+
+
+def test_fetch_cached_sends_conditional_requests(server, tmp_path):
+    url = f"{server}/flocks.csv"
+
+    path, changed = http_fetch.fetch_cached(url, cache_dir=str(tmp_path))
+    assert changed and open(path).read().startswith("State")
+    assert http_fetch.fetch_cached(url, cache_dir=str(tmp_path)) == (path, False)
+
+    StandIn.flocks += b"Ohio,20\n"
+    path, changed = http_fetch.fetch_cached(url, cache_dir=str(tmp_path))
+    assert changed and "Ohio" in open(path).read()
+
+
+def test_download_csv_caches_the_scraped_link(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_fetch, "HTTP_CACHE_DIR", str(tmp_path))
+    calls = StandIn.page_calls
+
+    df = download_csv(f"{server}/page.html", "csv")
+    _, changed = download_csv_cached(f"{server}/page.html", "csv")
+
+    assert "Flock Size" in df.columns
+    assert not changed
+    assert StandIn.page_calls == calls + 1
@@ -0,0 +1,26 @@
+import pandas as pd
+from app_modules.helper_modules.normalize import CDC_DATE, normalize_columns, pad_fips, strip_currency, to_dates
+
+
+def test_pad_fips_handles_mixed_inputs():
+    assert pad_fips([6007, "6007.0", "06007", None, "", "abc", 1.5]).tolist() == [
+        "06007", "06007", "06007", pd.NA, pd.NA, pd.NA, pd.NA
+    ]
+
+
+def test_strip_currency_and_dates():
+    assert strip_currency(["$1,234.50", " $2 ", "N/A"]).fillna(-1).tolist() == [1234.5, 2.0, -1]
+
+    dates = to_dates(["12-31-2024", "2024-01-05", None], format=CDC_DATE)
+    assert dates.tolist()[:2] == [pd.Timestamp("2024-12-31"), pd.Timestamp("2024-01-05")]
+    assert pd.isna(dates[2])
+
+
+def test_normalize_columns_skips_missing_columns():
+    df = pd.DataFrame({"State": ["  iowa", "NEW YORK"], "Close_Last": ["$1.00", "$2.50"]})
+
+    out = normalize_columns(df, currency=["Close_Last", "Open"], title=["State", "County"])
+
+    assert out["State"].tolist() == ["Iowa", "New York"]
+    assert out["Close_Last"].tolist() == [1.0, 2.5]
+    assert df["State"].tolist() == ["  iowa", "NEW YORK"]
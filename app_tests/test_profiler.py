@@ -0,0 +1,43 @@
+import json
+import plotly.graph_objects as go
+from app_modules import profiler
+from app_modules.profiler import finish_rerun, plotly_chart, profiled, span, start_rerun
+
+
+@profiled("prep")
+def prep_numbers():
+    with span("inner"):
+        return [1, 2, 3]
+
+
+@profiled("figure")
+def show_numbers():
+    plotly_chart(go.Figure(go.Bar(y=prep_numbers())))
+
+
+def test_spans_nest_under_the_rerun_and_record_payload():
+    start_rerun("tab")
+    show_numbers()
+    spans = finish_rerun()
+
+    assert [(s["name"], s["depth"]) for s in spans] == [
+        ("tab", 0), ("show_numbers", 1), ("prep_numbers", 2), ("inner", 3), ("st.plotly_chart", 2),
+    ]
+    assert spans[0]["seconds"] >= spans[1]["seconds"] > 0
+    assert spans[-1]["args"]["payload_bytes"] > 0
+
+
+def test_nothing_is_recorded_outside_a_profiled_rerun():
+    assert prep_numbers() == [1, 2, 3]
+    assert finish_rerun() == []
+
+
+def test_write_trace_emits_chrome_events(tmp_path):
+    start_rerun()
+    prep_numbers()
+    path = profiler.write_trace(finish_rerun(), str(tmp_path))
+
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    assert [e["name"] for e in events] == ["rerun", "prep_numbers", "inner"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
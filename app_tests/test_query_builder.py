@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+from app_modules.data_sources import register_memory_table
+from app_modules.query_builder import compile_query, query_columns
+from app_modules.query_gbq import query_table
+
+
+def test_compile_bigquery_rollup():
+    sql, params = compile_query(
+        "`p.chicken_egg.bird_flu`", "bigquery",
+        group_by=["Month", "State"],
+        aggregates={"Flock Size": ("sum", "Flock Size"), "lat": ("avg", "lat")},
+        month="Outbreak Date")
+
+    assert sql == (
+        "SELECT DATE_TRUNC(DATE(`Outbreak Date`), MONTH) AS `Month`, `State` AS `State`, "
+        "SUM(`Flock Size`) AS `Flock Size`, AVG(SAFE_CAST(`lat` AS FLOAT64)) AS `lat` "
+        "FROM `p.chicken_egg.bird_flu` GROUP BY 1, 2"
+    )
+    assert params == {}
+
+
+def test_query_columns_lists_source_columns():
+    assert query_columns() is None
+    assert query_columns(
+        group_by=["Month", "State"],
+        aggregates={"Wild Count": ("count", "*")},
+        month="Date Detected") == ["State", "Date Detected"]
+
+
+def test_rejects_unknown_aggregate():
+    with pytest.raises(ValueError):
+        compile_query("t", "duckdb", aggregates={"x": ("median", "x")})
+
+
+def test_memory_rollup_groups_by_month():
+    register_memory_table("test_rollup_wild_birds", pd.DataFrame({
+        "State": ["Iowa", "Iowa", "Ohio", "Iowa"],
+        "Date Detected": pd.to_datetime(["2024-01-03", "2024-01-20", "2024-01-05", "2024-02-01"]),
+    }))
+
+    df = query_table(
+        "test_rollup_wild_birds",
+        source="memory",
+        group_by=["Month", "State"],
+        aggregates={"Wild Count": ("count", "*")},
+        month="Date Detected").sort_values(["Month", "State"])
+
+    assert df["State"].tolist() == ["Iowa", "Ohio", "Iowa"]
+    assert df["Wild Count"].tolist() == [2, 1, 1]
+    assert pd.to_datetime(df["Month"]).dt.day.eq(1).all()
+
+
+def test_filters_compile_to_parameters():
+    sql, params = compile_query(
+        "`p.chicken_egg.calmaine`", "bigquery",
+        columns=["Date", "Close_Last"],
+        date_column="Date", date_from="2022-01-01", states=["Iowa"])
+
+    assert sql == (
+        "SELECT `Date`, `Close_Last` FROM `p.chicken_egg.calmaine` "
+        "WHERE `Date` >= @date_from AND `State` IN UNNEST(@states)"
+    )
+    assert params == {"date_from": "2022-01-01", "states": ["Iowa"]}
+
+
+def test_memory_source_applies_filters():
+    register_memory_table("test_filter_flu", pd.DataFrame({
+        "State": ["Iowa", "Ohio", "Iowa"],
+        "Outbreak Date": pd.to_datetime(["2021-12-31", "2022-03-01", "2022-06-30"]),
+        "Flock Size": [5, 10, 20],
+    }))
+
+    df = query_table(
+        "test_filter_flu", source="memory", date_column="Outbreak Date",
+        aggregates={"Flock Size": ("sum", "Flock Size")},
+        date_from="2022-01-01", date_to="2022-06-30", states=["Iowa"])
+
+    assert df["Flock Size"].iloc[0] == 20
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+from app_modules import query_gbq
+from app_modules.data_sources import register_memory_table
+from app_modules.query_gbq import QueryBudgetExceeded, query_table, recent_query_stats
+
+
+class FakeJob:
+    def __init__(self, df, bytes_processed):
+        self.df = df
+        self.total_bytes_processed = bytes_processed
+        self.total_bytes_billed = 10 * 1024 * 1024
+        self.cache_hit = False
+
+    def to_dataframe(self, create_bqstorage_client=True):
+        return self.df
+
+
+class FakeClient:
+    def __init__(self, bytes_processed):
+        self.bytes_processed = bytes_processed
+        self.runs, self.dry_runs = 0, 0
+
+    def query(self, sql, job_config=None):
+        if job_config.dry_run:
+            self.dry_runs += 1
+        else:
+            self.runs += 1
+        return FakeJob(pd.DataFrame({"State": ["Iowa", "Ohio"]}), self.bytes_processed)
+
+
+@pytest.fixture
+def bigquery(monkeypatch):
+    def use(bytes_processed, budget=None):
+        client = FakeClient(bytes_processed)
+        monkeypatch.setattr(query_gbq, "get_client", lambda: client)
+        monkeypatch.setattr(query_gbq, "get_table_columns", lambda table_name, project_id, refresh=False: ["State"])
+        monkeypatch.setattr(query_gbq, "table_versions", lambda source=None, project_id=None, refresh=False: {"bird_flu": 1})
+        if budget is None:
+            monkeypatch.delenv(query_gbq.QUERY_BYTE_BUDGET_ENV, raising=False)
+        else:
+            monkeypatch.setenv(query_gbq.QUERY_BYTE_BUDGET_ENV, str(budget))
+        query_gbq._query_cached.clear()
+        return client
+    return use
+
+
+def prep_memory_rows():
+    return query_table("test_stats_memory", columns=["State"], source="memory")
+
+
+def test_stats_record_rows_and_calling_prep_function():
+    register_memory_table("test_stats_memory", pd.DataFrame({"State": ["Iowa", "Ohio", "Utah"]}))
+
+    prep_memory_rows()
+
+    stats = recent_query_stats()[-1]
+    assert stats["caller"] == "prep_memory_rows"
+    assert stats["rows"] == 3 and stats["error"] is None
+    assert stats["bytes_processed"] is None and stats["seconds"] >= 0
+
+
+def test_stats_record_bytes_then_cache_hits(bigquery):
+    client = bigquery(bytes_processed=2048)
+
+    query_table("bird_flu", columns=["State"], source="bigquery")
+    query_table("bird_flu", columns=["State"], source="bigquery")
+
+    miss, hit = recent_query_stats()[-2:]
+    assert client.runs == 1 and client.dry_runs == 0
+    assert (miss["cache_hit"], miss["bytes_processed"], miss["rows"]) == (False, 2048, 2)
+    assert (hit["cache_hit"], hit["bytes_processed"], hit["bytes_billed"]) == (True, 0, 0)
+
+
+def test_budget_refuses_queries_over_the_limit(bigquery):
+    client = bigquery(bytes_processed=5000, budget=4096)
+
+    with pytest.raises(QueryBudgetExceeded):
+        query_table("bird_flu", columns=["State"], source="bigquery")
+
+    assert client.dry_runs == 1 and client.runs == 0
+    assert "QueryBudgetExceeded" in recent_query_stats()[-1]["error"]
+
+    client = bigquery(bytes_processed=1000, budget=4096)
+    query_table("bird_flu", columns=["State"], source="bigquery")
+    assert client.dry_runs == 1 and client.runs == 1
+
+
+def test_query_log_is_opt_in_and_never_breaks_the_query(monkeypatch, capsys, tmp_path):
+    register_memory_table("test_stats_log", pd.DataFrame({"State": ["Iowa"]}))
+
+    monkeypatch.delenv(query_gbq.QUERY_LOG_ENV, raising=False)
+    query_table("test_stats_log", columns=["State"], source="memory")
+    assert "query_stats" not in capsys.readouterr().out
+
+    # An unwritable log path only costs the log line
+    monkeypatch.setenv(query_gbq.QUERY_LOG_ENV, str(tmp_path / "missing" / "stats.jsonl"))
+    assert query_table("test_stats_log", columns=["State"], source="memory")["State"].tolist() == ["Iowa"]
+    assert "Could not write query stats" in capsys.readouterr().out
+
+
+def test_budget_refusal_reaches_the_prep_caller(bigquery, monkeypatch):
+    from app_modules import functions_app
+
+    client = bigquery(bytes_processed=5000, budget=4096)
+    monkeypatch.setattr(query_gbq, "get_table_columns", lambda table_name, project_id, refresh=False: ["Outbreak Date", "Flock Size"])
+    monkeypatch.delenv("CHICKEN_EGG_DATA_SOURCE", raising=False)
+
+    with pytest.raises(QueryBudgetExceeded):
+        functions_app.prep_bird_flu_data("bird_flu", group_by="none")
+    assert client.runs == 0
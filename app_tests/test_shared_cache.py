@@ -0,0 +1,176 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import pytest
+from app_modules import query_gbq, shared_cache
+from app_modules.helper_modules.compact import compact_frame
+from app_modules.shared_cache import DiskStore, HttpStore, cached_call, dumps, loads
+
+
+def test_results_round_trip_with_compact_dtypes():
+    df = compact_frame(pd.DataFrame({
+        "State": ["Iowa", "Ohio", "Iowa"],
+        "fips": ["19001", None, "39001"],
+        "Month": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-02-01"]),
+        "Flock Size": [10, 20, 30],
+    }))
+    result = (df, ["Iowa", "Ohio"], {"months": pd.DatetimeIndex(df["Month"]), "totals": np.arange(3.0)})
+
+    frame, states, cube = loads(dumps(result))
+
+    pd.testing.assert_frame_equal(frame, df)
+    assert states == ["Iowa", "Ohio"]
+    pd.testing.assert_index_equal(cube["months"], result[2]["months"])
+    np.testing.assert_array_equal(cube["totals"], result[2]["totals"])
+
+
+def test_disk_store_computes_once_per_data_version(tmp_path):
+    store = DiskStore(str(tmp_path))
+    calls = []
+
+    def rollup(state):
+        calls.append(state)
+        return pd.DataFrame({"State": [state]})
+
+    for _ in range(2):
+        assert cached_call(store, rollup, "v1", ("Iowa",))["State"].tolist() == ["Iowa"]
+    cached_call(store, rollup, "v2", ("Iowa",))
+    assert calls == ["Iowa", "Iowa"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_concurrent_misses_wait_for_one_computation(tmp_path):
+    calls = []
+
+    def slow_rollup():
+        calls.append(1)
+        time.sleep(0.3)
+        return pd.DataFrame({"x": [1]})
+
+    # Each worker opens the store itself, like separate processes would
+    results = []
+    workers = [
+        threading.Thread(target=lambda: results.append(cached_call(DiskStore(str(tmp_path)), slow_rollup, "v1")))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(calls) == 1
+    assert [r["x"].tolist() for r in results] == [[1]] * 4
+
+
+@pytest.fixture
+def http_store(tmp_path):
+    # Local stand-in for the network store: an in-memory GET/PUT server
+    entries = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in entries:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(entries[self.path])))
+            self.end_headers()
+            self.wfile.write(entries[self.path])
+
+        def do_PUT(self):
+            entries[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(201)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield HttpStore(f"http://127.0.0.1:{server.server_port}/results/", lock_dir=str(tmp_path)), entries
+    server.shutdown()
+
+
+def test_http_store_shares_results(http_store):
+    store, entries = http_store
+    calls = []
+
+    def totals():
+        calls.append(1)
+        return {"total_chicken_deaths": 5}
+
+    assert cached_call(store, totals, "v1") == {"total_chicken_deaths": 5}
+    assert cached_call(store, totals, "v1") == {"total_chicken_deaths": 5}
+    assert len(calls) == 1 and len(entries) == 1
+
+
+def test_prep_functions_use_the_shared_cache_across_restarts(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHICKEN_EGG_DATA_SOURCE", "duckdb")
+    monkeypatch.setenv(shared_cache.SHARED_CACHE_ENV, "disk")
+    monkeypatch.setenv(shared_cache.SHARED_CACHE_DIR_ENV, str(tmp_path))
+    monkeypatch.setattr(shared_cache, "_stores", {})
+    monkeypatch.setattr(query_gbq, "table_versions", lambda source=None, project_id=None, refresh=False: {"bird_flu": 1})
+    calls = []
+
+    @query_gbq.cache_by_data_version
+    def prep_shared_rows(n):
+        calls.append(n)
+        return pd.DataFrame({"n": range(n)})
+
+    assert len(prep_shared_rows(3)) == 3
+    # A restarted worker has an empty st.cache_data but finds the shared result
+    prep_shared_rows.clear()
+    assert len(prep_shared_rows(3)) == 3
+    assert calls == [3]
+
+
+def test_keys_change_with_constants_defaults_and_release(tmp_path):
+    def prep_a(start="2022-01-01"):
+        return "Iowa"
+
+    def prep_b(start="2023-01-01"):
+        return "Iowa"
+
+    def prep_c(start="2022-01-01"):
+        return "Ohio"
+
+    for other in (prep_b, prep_c):
+        other.__name__ = other.__qualname__ = prep_a.__qualname__
+    keys = {shared_cache.result_key(f, "v1", (), {}) for f in (prep_a, prep_b, prep_c)}
+    assert len(keys) == 3
+
+    # Any change to the app_modules sources gives a new release hash
+    (tmp_path / "helpers.py").write_text("DASHBOARD_START = '2022-01-01'\n")
+    before = shared_cache.release_hash(str(tmp_path))
+    (tmp_path / "helpers.py").write_text("DASHBOARD_START = '2023-01-01'\n")
+    shared_cache.release_hash.cache_clear()
+    assert shared_cache.release_hash(str(tmp_path)) != before
+
+
+def test_frame_arguments_are_keyed_by_content(tmp_path):
+    store = DiskStore(str(tmp_path))
+
+    def total(df):
+        return int(df["Flock Size"].sum())
+
+    # Frames over 60 rows print with their middle rows elided
+    first = pd.DataFrame({"Flock Size": [1] * 100})
+    second = first.copy()
+    second.loc[50, "Flock Size"] = 999
+    assert repr(first) == repr(second)
+
+    assert cached_call(store, total, "v1", (first,)) == 100
+    assert cached_call(store, total, "v1", (second,)) == 1098
+    assert cached_call(store, total, "v1", (first.copy(),)) == 100
+    assert len(list(tmp_path.glob("*.bin"))) == 2
+
+    # Arguments without a content key are computed every time, never shared
+    calls = []
+    nested = pd.DataFrame({"cells": [[1], [2]]})
+    for _ in range(2):
+        cached_call(store, lambda df: calls.append(len(df)), "v1", (nested,))
+    assert calls == [2, 2]
+    assert len(list(tmp_path.glob("*.bin"))) == 2
@@ -0,0 +1,153 @@
+import threading
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from google.api_core.exceptions import BadRequest, NotFound
+from google.cloud import bigquery
+from app_bigquery import upload_engine
+from app_bigquery.manifest import load_manifest
+from app_bigquery.upload_engine import read_upload_table, upload_table, upload_tables
+from app_modules.helper_modules import artifacts
+from app_modules.helper_modules.artifacts import write_artifact
+
+
+class FakeJob:
+    def __init__(self, df=None):
+        self.df = df
+
+    def to_dataframe(self):
+        return self.df
+
+    def result(self):
+        return self
+
+
+class FakeClient:
+    def __init__(self, max_dates):
+        self.max_dates = max_dates
+        self.created, self.loaded = [], {}
+        self.lock = threading.Lock()
+
+    def get_table(self, table_id):
+        raise NotFound(table_id)
+
+    def create_table(self, table):
+        with self.lock:
+            self.created.append(table.table_id)
+
+    def query(self, sql):
+        table = sql.rsplit(".", 1)[1].strip("`")
+        return FakeJob(pd.DataFrame({"max_date": [self.max_dates.get(table)]}))
+
+    def load_table_from_file(self, file_obj, table_id, job_config=None):
+        df = pq.read_table(file_obj).to_pandas()
+        with self.lock:
+            self.loaded[table_id.rsplit(".", 1)[1]] = df
+        return FakeJob()
+
+
+STOCK_ROWS = pd.DataFrame({
+    "Date": ["2024-01-01", "2024-02-01", "2024-03-01"],
+    "Open": ["$1.00", "$2.00", "$3.00"], "High": [1, 2, 3], "Low": [1, 2, 3],
+    "Close_Last": [1, 2, 3], "Volume": [10.0, 20.0, 30.0],
+})
+
+
+def _artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(upload_engine, "UPLOAD_TABLES", {
+        name: upload_engine.UPLOAD_TABLES[name] for name in ("calmaine", "bird_flu")
+    })
+    write_artifact("calmaine", STOCK_ROWS)
+    write_artifact("bird_flu", pd.DataFrame({
+        "State": ["California", "Iowa"], "County": ["Butte", "Nowhere"],
+        "Outbreak Date": ["2024-12-31", "2025-01-02"], "Flock Type": ["x", "y"], "Flock Size": [70, 10],
+        "State Abbrev": ["CA", "IA"], "fips": [6007.0, None], "lat": [39.6, None], "lng": [-121.6, None],
+    }))
+
+
+def test_read_upload_table_drops_rows_missing_required_columns(tmp_path, monkeypatch):
+    _artifacts(tmp_path, monkeypatch)
+    table = read_upload_table("bird_flu", upload_engine.UPLOAD_TABLES["bird_flu"])
+
+    assert table.column_names == artifacts.ARTIFACT_SCHEMAS["bird_flu"].names
+    assert table["fips"].to_pylist() == ["06007"]
+    assert table["lat"].to_pylist() == [39.6]
+
+
+def test_bigquery_schema_follows_artifact_types():
+    types = {f.name: f.field_type for f in upload_engine.bigquery_schema("bird_flu")}
+
+    assert types["Outbreak Date"] == "DATE"
+    assert types["Flock Size"] == "INTEGER"
+    assert types["lat"] == "FLOAT"
+    assert types["fips"] == "STRING"
+
+
+def test_upload_tables_appends_new_rows_with_one_client(tmp_path, monkeypatch):
+    _artifacts(tmp_path, monkeypatch)
+    client = FakeClient({"calmaine": pd.Timestamp("2024-01-15")})
+
+    results = upload_tables("project", client=client, manifest_path=None)
+
+    assert sorted(client.created) == ["bird_flu", "calmaine"]
+    assert client.loaded["calmaine"]["Open"].tolist() == [2.0, 3.0]
+    assert {r["table"]: r["rows"] for r in results} == {"calmaine": 2, "bird_flu": 1}
+
+
+def test_manifest_skips_unchanged_outputs(tmp_path, monkeypatch):
+    _artifacts(tmp_path, monkeypatch)
+    manifest_path = str(tmp_path / "manifest.json")
+
+    upload_tables("project", client=FakeClient({}), manifest_path=manifest_path)
+    manifest = load_manifest(manifest_path)
+    assert manifest["calmaine"]["max_date"] == "2024-03-01" and manifest["calmaine"]["rows"] == 3
+
+    # Nothing changed: no client is built and nothing is queried
+    monkeypatch.setattr(upload_engine, "get_client", lambda project_id: 1 / 0)
+    results = upload_tables("project", manifest_path=manifest_path)
+    assert all(r["skipped"] for r in results)
+
+    # One output changed: only it is loaded, from the recorded watermark
+    write_artifact("calmaine", pd.concat([STOCK_ROWS, pd.DataFrame({
+        "Date": ["2024-04-01"], "Open": ["$4.00"], "High": [4], "Low": [4], "Close_Last": [4], "Volume": [40.0],
+    })]))
+    client = FakeClient({})
+    client.query = lambda sql: 1 / 0
+    results = upload_tables("project", client=client, manifest_path=manifest_path)
+
+    assert list(client.loaded) == ["calmaine"]
+    assert client.loaded["calmaine"]["Open"].tolist() == [4.0]
+    assert load_manifest(manifest_path)["calmaine"]["max_date"] == "2024-04-01"
+
+
+class RejectingClient(FakeClient):
+    """An existing table with the given schema that rejects every append."""
+
+    def __init__(self, schema):
+        super().__init__({})
+        self.schema = schema
+        self.dispositions = []
+
+    def get_table(self, table_id):
+        return bigquery.Table(table_id, schema=self.schema)
+
+    def load_table_from_file(self, file_obj, table_id, job_config=None):
+        self.dispositions.append(job_config.write_disposition)
+        if job_config.write_disposition == bigquery.WriteDisposition.WRITE_APPEND:
+            raise BadRequest("rejected")
+        return super().load_table_from_file(file_obj, table_id, job_config)
+
+
+def test_append_errors_replace_the_table_only_on_a_schema_mismatch(tmp_path, monkeypatch):
+    _artifacts(tmp_path, monkeypatch)
+
+    client = RejectingClient(upload_engine.bigquery_schema("calmaine"))
+    with pytest.raises(BadRequest):
+        upload_table(client, "project", "calmaine")
+    assert client.dispositions == ["WRITE_APPEND"]
+
+    client = RejectingClient([bigquery.SchemaField("Date", "STRING")])
+    upload_table(client, "project", "calmaine")
+    assert client.dispositions == ["WRITE_APPEND", "WRITE_TRUNCATE"]
+    assert len(client.loaded["calmaine"]) == 3
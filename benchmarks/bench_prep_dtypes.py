@@ -0,0 +1,59 @@
+# benchmarks/bench_prep_dtypes.py
+"""
+Compares the frames returned by the prep_* functions before and after
+compact_frame: memory per cached frame, and what one st.cache_data hit
+costs (st.cache_data keeps the pickled frame and unpickles a copy per hit).
+
+Runs offline against the local Parquet store:
+    python -m benchmarks.bench_prep_dtypes
+"""
+
+import inspect
+import os
+import pickle
+import time
+from unittest import mock
+
+os.environ.setdefault("CHICKEN_EGG_DATA_SOURCE", "duckdb")
+
+from app_modules import functions_app
+
+HITS = 200
+
+CASES = {
+    "bird_flu (state)": lambda: inspect.unwrap(functions_app.prep_bird_flu_data)("bird_flu", group_by="state"),
+    "bird_flu (county)": lambda: inspect.unwrap(functions_app.prep_bird_flu_data)("bird_flu", group_by="county"),
+    "wild_birds": lambda: inspect.unwrap(functions_app.prep_wild_bird_data)("wild_birds")[0],
+    "stocks (calmaine)": lambda: inspect.unwrap(functions_app.prep_stock_price_data)()[0],
+}
+
+
+def measure(frame):
+    payload = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    for _ in range(HITS):
+        pickle.loads(payload)
+    return {
+        "memory": int(frame.memory_usage(deep=True).sum()),
+        "pickled": len(payload),
+        "hit_ms": (time.perf_counter() - start) / HITS * 1000,
+    }
+
+
+def main():
+    print(f"{'frame':<20} {'rows':>6}  {'memory':>17}  {'pickled':>17}  {'hit copy (ms)':>15}")
+    for name, prep in CASES.items():
+        with mock.patch.object(functions_app, "compact_frame", lambda df: df):
+            before = prep()
+        after = prep()
+        b, a = measure(before), measure(after)
+        print(
+            f"{name:<20} {len(after):>6}  "
+            f"{b['memory'] / 1024:>7.0f}K -> {a['memory'] / 1024:>5.0f}K  "
+            f"{b['pickled'] / 1024:>7.0f}K -> {a['pickled'] / 1024:>5.0f}K  "
+            f"{b['hit_ms']:>6.3f} -> {a['hit_ms']:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
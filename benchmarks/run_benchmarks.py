@@ -0,0 +1,196 @@
+# benchmarks/run_benchmarks.py
+"""
+Times the prep and map functions on synthetic data (benchmarks/synthetic.py)
+at 1x, 10x and 100x today's volume, fully offline through the memory data
+source. Results are written as JSON; with a baseline, the run fails when
+any case got slower than the regression threshold allows.
+
+    python -m benchmarks.run_benchmarks                      # write benchmarks/results/<commit>.json
+    python -m benchmarks.run_benchmarks --save-baseline      # also make it the baseline
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import datetime
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+import streamlit as st
+from streamlit import logger as st_logger
+from app_modules import functions_app, visualizations_app
+from app_modules.data_sources import DATA_SOURCE_ENV, clear_memory_tables, register_memory_table
+from app_modules.helper_modules import geo_assets
+from benchmarks.synthetic import make_state_shapes, make_tables
+
+SCALES = [1, 10, 100]
+REPEATS = 3
+
+RESULTS_DIR = "benchmarks/results"
+BASELINE_PATH = "benchmarks/baseline.json"
+
+# A case regresses when its median time grows by more than this fraction
+# of the baseline and by more than the noise floor
+REGRESSION_THRESHOLD = 0.25
+NOISE_FLOOR_SECONDS = 0.01
+
+
+def _fresh():
+    # Every timed call starts cold: no cached prep results and no cube to extend
+    st.cache_data.clear()
+    # Loggers streamlit created since the last call warn about bare mode on every widget
+    st_logger.set_log_level("error")
+    functions_app._state_cubes.clear()
+
+
+def _cases():
+    """
+    Returns {case: (setup, timed)}. setup runs untimed and its result is passed to timed.
+    """
+    # The undecorated prep functions: no profiler span and no st.cache_data
+    prep = {name: inspect.unwrap(getattr(functions_app, name)) for name in dir(functions_app) if name.startswith("prep_")}
+    return {
+        "prep_bird_flu_data[none]": (None, lambda _: prep["prep_bird_flu_data"]("bird_flu", group_by="none")),
+        "prep_bird_flu_data[state]": (None, lambda _: prep["prep_bird_flu_data"]("bird_flu", group_by="state")),
+        "prep_bird_flu_data[county]": (None, lambda _: prep["prep_bird_flu_data"]("bird_flu", group_by="county")),
+        "prep_wild_bird_data": (None, lambda _: prep["prep_wild_bird_data"]("wild_birds")),
+        "prep_egg_price_data": (None, lambda _: prep["prep_egg_price_data"]()),
+        "prep_stock_price_data": (None, lambda _: prep["prep_stock_price_data"]()),
+        "prep_state_cube": (None, lambda _: prep["prep_state_cube"]()),
+        "prep_county_store": (None, lambda _: prep["prep_county_store"]()),
+        "show_wild_bird_map": (
+            lambda: (prep["prep_state_cube"](), prep["prep_wild_bird_data"]("wild_birds")[1]),
+            lambda data: visualizations_app.show_wild_bird_map(*data),
+        ),
+        "show_flock_county_choropleth": (
+            lambda: prep["prep_county_store"](),
+            visualizations_app.show_flock_county_choropleth,
+        ),
+    }
+
+
+def _time_case(setup, timed, repeats):
+    seconds = []
+    for _ in range(repeats):
+        _fresh()
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            data = setup() if setup else None
+            start = time.perf_counter()
+            timed(data)
+            seconds.append(time.perf_counter() - start)
+    return {"median": statistics.median(seconds), "min": min(seconds)}
+
+
+def _use_local_state_shapes():
+    """
+    Points the states asset at synthetic shapes when the real file is not
+    on disk, so the wild bird map never downloads. Returns which shapes are used.
+    """
+    asset = geo_assets.GEO_ASSETS["states"]
+    if os.path.exists(asset["path"]):
+        return "app_data"
+    path = os.path.join(tempfile.mkdtemp(prefix="chicken_egg_bench_"), "us_states.geojson")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_state_shapes(), f)
+    asset["path"] = path
+    return "synthetic"
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(scales=SCALES, repeats=REPEATS):
+    os.environ[DATA_SOURCE_ENV] = "memory"
+    report = {
+        "commit": _commit(),
+        "created": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "state_shapes": _use_local_state_shapes(),
+        "repeats": repeats,
+        "results": {},
+    }
+    for scale in scales:
+        clear_memory_tables()
+        tables = make_tables(scale)
+        for name, df in tables.items():
+            register_memory_table(name, df)
+
+        label = f"{scale}x"
+        report["results"][label] = {"rows": {name: len(df) for name, df in tables.items()}, "cases": {}}
+        for case, (setup, timed) in _cases().items():
+            timing = _time_case(setup, timed, repeats)
+            report["results"][label]["cases"][case] = timing
+            print(f"{label:>5} {case:<30} {timing['median'] * 1000:9.1f} ms")
+    return report
+
+
+def find_regressions(report, baseline, threshold=REGRESSION_THRESHOLD, noise_floor=NOISE_FLOOR_SECONDS):
+    """
+    Returns [(scale, case, baseline seconds, current seconds)] for cases whose
+    median grew past the threshold. Cases missing from either report are ignored.
+    """
+    regressions = []
+    for scale, current in report["results"].items():
+        before = baseline.get("results", {}).get(scale, {}).get("cases", {})
+        for case, timing in current["cases"].items():
+            if case not in before:
+                continue
+            old, new = before[case]["median"], timing["median"]
+            if new > old * (1 + threshold) and new - old > noise_floor:
+                regressions.append((scale, case, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="results to compare against, if the file exists")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline as well")
+    args = parser.parse_args(argv)
+
+    report = run(args.scales, args.repeats)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    paths = [output] + ([args.baseline] if args.save_baseline else [])
+    for path in paths:
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = find_regressions(report, baseline, args.threshold)
+    for scale, case, old, new in regressions:
+        print(f"REGRESSION {scale} {case}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms")
+    if regressions:
+        print(f"{len(regressions)} cases are more than {args.threshold:.0%} slower than {args.baseline} ({baseline.get('commit')})")
+        return 1
+    print(f"No regressions against {args.baseline} ({baseline.get('commit')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# benchmarks/synthetic.py
+"""
+Seeded generators for the dashboard tables at a multiple of today's volume.
+Rows use real county names, FIPS codes and centroids, and outbreaks cluster
+in a few counties and in the winter months like the real feeds do.
+"""
+
+import numpy as np
+import pandas as pd
+from app_modules.helper_modules.geodata import (
+    CENTROIDS_PATH,
+    FIPS_MASTER_PATH,
+    STATE_TO_ABBREV,
+    normalize_county,
+)
+
+# Rows per table in the April 2025 extracts, i.e. scale 1
+BASE_ROWS = {
+    "bird_flu": 1700,
+    "wild_birds": 12900,
+    "egg_prices": 40,
+    "stock": 2500,
+}
+
+HISTORY_START = "2022-01-01"
+HISTORY_END = "2025-04-30"
+
+FLOCK_TYPES = [
+    "WOAH Non-Poultry", "Commercial Turkey Meat Bird", "WOAH Poultry",
+    "Commercial Table Egg Layer", "Commercial Broiler Production", "Live Bird Market",
+]
+BIRD_SPECIES = 230
+
+# Relative outbreak volume per calendar month, peaking in late winter
+MONTH_WEIGHTS = np.array([3, 4, 4, 3, 2, 1, 1, 1, 1, 2, 3, 3], dtype=float)
+
+
+def _counties():
+    """
+    Returns county name, state, abbreviation, FIPS and centroid for every county with a centroid.
+    """
+    fips = pd.read_csv(FIPS_MASTER_PATH).dropna(subset=["state"])
+    centroids = pd.read_csv(CENTROIDS_PATH, usecols=["cfips", "lat", "lng"])
+    counties = fips.merge(centroids, left_on="fips", right_on="cfips")
+    state_names = {abbrev: name for name, abbrev in STATE_TO_ABBREV.items()}
+    counties["State"] = counties["state"].map(state_names)
+    counties["County"] = normalize_county(counties["name"]).str.title()
+    return counties.dropna(subset=["State"]).reset_index(drop=True)
+
+
+def _sample_counties(rng, counties, n):
+    # A few counties take most of the outbreaks
+    weights = 1.0 / np.arange(1, len(counties) + 1) ** 0.8
+    order = rng.permutation(len(counties))
+    return counties.iloc[order[rng.choice(len(counties), size=n, p=weights / weights.sum())]]
+
+
+def _sample_dates(rng, n):
+    days = pd.date_range(HISTORY_START, HISTORY_END, freq="D")
+    weights = MONTH_WEIGHTS[days.month - 1]
+    return pd.DatetimeIndex(rng.choice(days, size=n, p=weights / weights.sum())).sort_values()
+
+
+def make_bird_flu(scale=1, seed=0):
+    rng = np.random.default_rng(seed)
+    n = BASE_ROWS["bird_flu"] * scale
+    rows = _sample_counties(rng, _counties(), n)
+    return pd.DataFrame({
+        "County": rows["County"].to_numpy(),
+        "State": rows["State"].to_numpy(),
+        "Outbreak Date": _sample_dates(rng, n),
+        "Flock Type": rng.choice(FLOCK_TYPES, size=n),
+        # Median around a thousand birds with a long tail of large layer farms
+        "Flock Size": rng.lognormal(7, 3, size=n).round().clip(0, 6_000_000).astype("int64"),
+        "State Abbrev": rows["state"].to_numpy(),
+        "fips": rows["fips"].astype(str).str.zfill(5).to_numpy(),
+        "lng": rows["lng"].to_numpy(),
+        "lat": rows["lat"].to_numpy(),
+    })
+
+
+def make_wild_birds(scale=1, seed=1):
+    rng = np.random.default_rng(seed)
+    n = BASE_ROWS["wild_birds"] * scale
+    rows = _sample_counties(rng, _counties(), n)
+    species = np.array([f"Species {i}" for i in range(BIRD_SPECIES)])
+    return pd.DataFrame({
+        "State": rows["State"].to_numpy(),
+        "County": rows["County"].to_numpy(),
+        "Date Detected": _sample_dates(rng, n),
+        "Bird Species": species[rng.zipf(1.5, size=n) % BIRD_SPECIES],
+    })
+
+
+def _price_series(rng, dates, scale, start_price):
+    """
+    A random-walk price at each date, with scale quotes per date.
+    """
+    dates = dates.repeat(scale)
+    steps = rng.normal(0, 0.01, size=len(dates))
+    return dates, start_price * np.exp(np.cumsum(steps))
+
+
+def make_egg_prices(scale=1, seed=2):
+    rng = np.random.default_rng(seed)
+    months = pd.date_range(end=HISTORY_END, periods=BASE_ROWS["egg_prices"], freq="MS")
+    dates, prices = _price_series(rng, months, scale, 2.0)
+    return pd.DataFrame({"Date": dates, "Avg_Price": prices.round(3)})
+
+
+def make_stock(scale=1, seed=3):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end=HISTORY_END, periods=BASE_ROWS["stock"])
+    dates, close = _price_series(rng, days, scale, 40.0)
+    return pd.DataFrame({
+        "Date": dates,
+        "Close_Last": close.round(2),
+        "Volume": rng.integers(100_000, 2_000_000, size=len(dates)),
+        "Open": close.round(2),
+        "High": (close * 1.01).round(2),
+        "Low": (close * 0.99).round(2),
+    })
+
+
+def make_tables(scale=1):
+    """
+    Returns {table: DataFrame} for every dashboard table at scale x today's volume.
+    Ticker histories repeat each trading day scale times (intraday snapshots),
+    since their calendar cannot grow.
+    """
+    tables = {
+        "bird_flu": make_bird_flu(scale),
+        "wild_birds": make_wild_birds(scale),
+        "egg_prices": make_egg_prices(scale),
+    }
+    for seed, name in enumerate(("calmaine", "vitl", "post"), start=3):
+        tables[name] = make_stock(scale, seed=seed)
+    return tables
+
+
+def make_state_shapes(counties=None):
+    """
+    Returns a GeoJSON of one box per state around its county centroids,
+    standing in for app_data/us_states.geojson when it is not on disk.
+    """
+    counties = _counties() if counties is None else counties
+    features = []
+    for state, rows in counties.groupby("State"):
+        west, east = rows["lng"].min() - 0.5, rows["lng"].max() + 0.5
+        south, north = rows["lat"].min() - 0.5, rows["lat"].max() + 0.5
+        ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+        features.append({
+            "type": "Feature",
+            "properties": {"NAME": state},
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+        })
+    return {"type": "FeatureCollection", "features": features}
@@ -1,5 +1,6 @@
 # main_app.py
 
+import os
 import streamlit as st
 st.set_page_config(page_title="Chicken Economics", layout="wide")  # ✅ MUST BE FIRST
 
@@ -11,8 +12,32 @@ from app_modules.tabs_app import (
     render_tab4_dashboard,
     render_tab5_appendix
 )
+from app_modules.visualizations_app import diagnostics_enabled, show_query_diagnostics
+from app_modules.profiler import (
+    TRACE_DIR_ENV,
+    finish_rerun,
+    profiling_enabled,
+    show_profile,
+    start_rerun,
+    write_trace,
+)
 
 def main():
+    if not profiling_enabled():
+        render()
+        return
+
+    start_rerun()
+    try:
+        render()
+    finally:
+        spans = finish_rerun()
+    if os.getenv(TRACE_DIR_ENV):
+        print(f"Wrote rerun trace to {write_trace(spans)}")
+    show_profile(spans)
+
+
+def render():
     apply_styles()
 
     # Sidebar tab selection (vertical layout)
@@ -42,5 +67,9 @@ def main():
     elif tab == "📚 Appendix":
         render_tab5_appendix()
 
+    # Drawn last so it includes this run's queries
+    if diagnostics_enabled():
+        show_query_diagnostics()
+
 if __name__ == "__main__":
     main()